@@ -0,0 +1,120 @@
+# Bitmap (bitset per value) index used for tag and facet filtering. Each
+# (field, value) pair owns a Python int whose bit i is set when record i
+# has that value, so multi-tag intersections are a few big-int ANDs and
+# facet counts are popcounts of (value bits & current selection).
+
+def ids_to_bits(ids):
+    if not ids:
+        return 0
+    buf = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, 'little')
+
+def iter_ids(bits):
+    # Set bit positions in ascending order
+    digits = bin(bits)[:1:-1]
+    i = digits.find('1')
+    while i >= 0:
+        yield i
+        i = digits.find('1', i + 1)
+
+def popcount(bits):
+    return bits.bit_count()
+
+class BitmapIndex:
+    def __init__(self, fields=None):
+        # fields limits which record keys are indexed; None indexes all
+        self.fields = fields
+        self.bits = {}  # field -> value -> int
+        self.all_bits = 0
+        self._values = {}  # id -> [(field, value)]
+
+    def __len__(self):
+        return popcount(self.all_bits)
+
+    def __contains__(self, record_id):
+        return record_id in self._values
+
+    def _pairs(self, record):
+        pairs = []
+        for field in (self.fields if self.fields is not None else record):
+            value = record.get(field)
+            for v in (value if isinstance(value, (list, tuple, set)) else [value]):
+                pairs.append((field, v))
+        return pairs
+
+    def add(self, record_id, record):
+        # record maps field -> value or list of values (e.g. tags)
+        self.add_many([(record_id, record)])
+
+    def add_many(self, items):
+        # Bulk load: each bitmap is built once from its ids instead of being
+        # widened one bit at a time
+        new = {}
+        ids = []
+        for record_id, record in items:
+            if record_id in self._values:
+                self.remove(record_id)
+            pairs = self._pairs(record)
+            self._values[record_id] = pairs
+            ids.append(record_id)
+            for field, value in pairs:
+                new.setdefault(field, {}).setdefault(value, []).append(record_id)
+        for field, by_value in new.items():
+            bits = self.bits.setdefault(field, {})
+            for value, value_ids in by_value.items():
+                bits[value] = bits.get(value, 0) | ids_to_bits(value_ids)
+        self.all_bits |= ids_to_bits(ids)
+
+    def remove(self, record_id):
+        pairs = self._values.pop(record_id, None)
+        if pairs is None:
+            return
+        mask = ~(1 << record_id)
+        for field, value in pairs:
+            by_value = self.bits[field]
+            by_value[value] &= mask
+            if not by_value[value]:
+                del by_value[value]
+        self.all_bits &= mask
+
+    def match(self, field, value):
+        return self.bits.get(field, {}).get(value, 0)
+
+    def values(self, field):
+        return list(self.bits.get(field, {}))
+
+    def select(self, field, selection):
+        # A list/tuple/set selection requires every value (multi-tag AND)
+        if isinstance(selection, (list, tuple, set)):
+            bits = self.all_bits
+            for value in selection:
+                bits &= self.match(field, value)
+            return bits
+        return self.match(field, selection)
+
+    def filter(self, filters, base=None):
+        # AND of every field=selection in filters (None selections are skipped)
+        bits = self.all_bits if base is None else base & self.all_bits
+        for field, selection in filters.items():
+            if selection is not None:
+                bits &= self.select(field, selection)
+        return bits
+
+    def facet_counts(self, filters=None, base=None, fields=None):
+        # {field: {value: count}} for the records matching base and filters.
+        # Each field's own filter is left out of its counts so a combo box
+        # can show what every alternative selection would return.
+        filters = {f: s for f, s in (filters or {}).items() if s is not None}
+        selected = {f: self.select(f, s) for f, s in filters.items()}
+        base = self.all_bits if base is None else base & self.all_bits
+        counts = {}
+        for field in (fields if fields is not None else self.bits):
+            bits = base
+            for other, other_bits in selected.items():
+                if other != field:
+                    bits &= other_bits
+            counts[field] = {value: popcount(value_bits & bits)
+                             for value, value_bits in self.bits.get(field, {}).items()}
+        return counts
@@ -0,0 +1,153 @@
+import os
+import json
+import queue
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Cover art for the game grid. Thumbnails are generated off the Tk thread
+# into a content-addressed cache (ROMForge/Covers/thumbs/<w>x<h>/<sha1>.png)
+# and only the small thumbnail is ever turned into a PhotoImage. Decoded
+# PhotoImages are kept in an LRU bounded by their pixel memory. PIL is
+# imported when the first cover is decoded, not when the GUI starts.
+
+THUMB_ROOT = 'ROMForge/Covers/thumbs'
+INDEX_FILE = 'index.json'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+POLL_MS = 30
+
+class ThumbnailCache:
+    def __init__(self, widget, sizes, root=THUMB_ROOT, max_bytes=DEFAULT_MAX_BYTES, workers=4):
+        self.widget = widget
+        self.sizes = tuple(sizes)
+        self.root = root
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.images = OrderedDict()  # (src, size) -> (PhotoImage, bytes)
+        self.pending = set()
+        self.callbacks = {}
+        self.ready = queue.Queue()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.digests = {}  # src -> [mtime_ns, size, sha1]
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self.digests = json.load(f)
+            except (OSError, ValueError):
+                self.digests = {}
+        self.widget.after(POLL_MS, self._poll)
+
+    def _digest(self, src):
+        st = os.stat(src)
+        with self._lock:
+            known = self.digests.get(src)
+        if known and known[0] == st.st_mtime_ns and known[1] == st.st_size:
+            return known[2]
+        h = hashlib.sha1()
+        with open(src, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self.digests[src] = [st.st_mtime_ns, st.st_size, digest]
+        return digest
+
+    def thumb_path(self, digest, size):
+        return os.path.join(self.root, f"{size[0]}x{size[1]}", digest[:2], f"{digest}.png")
+
+    def ensure_thumbnails(self, src):
+        # Decode the full-size cover at most once and write every size
+        digest = self._digest(src)
+        missing = [s for s in self.sizes if not os.path.exists(self.thumb_path(digest, s))]
+        if missing:
+            from PIL import Image
+            with Image.open(src) as img:
+                img = img.convert('RGBA')
+                for size in missing:
+                    thumb = img.copy()
+                    thumb.thumbnail(size, Image.LANCZOS)
+                    path = self.thumb_path(digest, size)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                    thumb.save(tmp_path, 'PNG')
+                    os.replace(tmp_path, path)
+        return digest
+
+    def _load(self, src, size):
+        from PIL import Image
+        digest = self.ensure_thumbnails(src)
+        with Image.open(self.thumb_path(digest, size)) as img:
+            img.load()
+            return img.copy()
+
+    def _worker(self, key):
+        try:
+            img = self._load(*key)
+        except (OSError, ValueError) as e:
+            print(f"Could not load cover {key[0]}: {e}")
+            img = None
+        self.ready.put((key, img))
+
+    def _poll(self):
+        # Runs on the Tk thread: wrap finished thumbnails in PhotoImages
+        while True:
+            try:
+                key, img = self.ready.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            callbacks = self.callbacks.pop(key, [])
+            if img is None:
+                continue
+            from PIL import ImageTk
+            photo = ImageTk.PhotoImage(img)
+            self._store(key, photo, img.width * img.height * 4)
+            for callback in callbacks:
+                callback(photo)
+        self.widget.after(POLL_MS, self._poll)
+
+    def _store(self, key, photo, nbytes):
+        if key in self.images:
+            self.total_bytes -= self.images.pop(key)[1]
+        self.images[key] = (photo, nbytes)
+        self.total_bytes += nbytes
+        while self.total_bytes > self.max_bytes and len(self.images) > 1:
+            _, (_, evicted) = self.images.popitem(last=False)
+            self.total_bytes -= evicted
+
+    def get(self, src, size, callback=None):
+        # Returns the PhotoImage if it is cached; otherwise queues it and
+        # calls callback(photo) on the Tk thread once it is ready. Tiles
+        # sharing a cover each get their callback.
+        key = (src, tuple(size))
+        entry = self.images.get(key)
+        if entry is not None:
+            self.images.move_to_end(key)
+            return entry[0]
+        if callback:
+            self.callbacks.setdefault(key, []).append(callback)
+        if key not in self.pending:
+            self.pending.add(key)
+            self.pool.submit(self._worker, key)
+        return None
+
+    def _pregenerate_one(self, src):
+        try:
+            self.ensure_thumbnails(src)
+        except (OSError, ValueError) as e:
+            print(f"Could not create thumbnails for {src}: {e}")
+
+    def pregenerate(self, paths):
+        for src in paths:
+            self.pool.submit(self._pregenerate_one, src)
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            data = dict(self.digests)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
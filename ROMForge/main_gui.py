@@ -1,11 +1,16 @@
 import os
+import sys
 import threading
 import json
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
+from cover_cache import ThumbnailCache
+from search_index import SearchIndex
+from bitmap_index import iter_ids
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import Catalog
 
 # --- Constants ---
 SIDEBAR_WIDTH = 200
@@ -13,6 +18,12 @@ DETAIL_WIDTH = 300
 COVER_SIZE = (150, 200)
 LARGE_COVER_SIZE = (250, 350)
 HIGHLIGHT_COLOR = '#1464f4'
+GRID_MARGIN = 30
+TILE_WIDTH = COVER_SIZE[0] + 30
+TILE_HEIGHT = COVER_SIZE[1] + 40
+OVERSCAN_ROWS = 2
+SCROLL_STEP = 20
+SEARCH_DEBOUNCE_MS = 120
 THEME = 'superhero'
 UI_STATE_FILE = 'ROMForge/ui_state.json'
 
@@ -42,13 +53,21 @@ class ROMManagerApp(tb.Window):
         self.minsize(1100, 700)
         self.protocol('WM_DELETE_WINDOW', self.on_exit)
         self.ui_state = load_ui_state()
-        self.games = []  # List of game dicts
+        self.games = {}  # game id -> game dict
         self.filtered_games = []
+        self.search_index = SearchIndex()
+        self._next_game_id = 0
+        self._filter_job = None
+        self._combo_labels = {}  # combo -> {label shown: facet value}
         self.favorites = set(self.ui_state.get('favorites', []))
         self.selected_game = None
-        self.cover_cache = {}
+        self.cover_cache = ThumbnailCache(self, (COVER_SIZE, LARGE_COVER_SIZE))
+        self._grid_generation = 0
+        self._icons = {}
         self._build_layout()
-        self._load_games_async()
+        # Start loading once the window has been drawn, so the first frame
+        # never waits on the catalog
+        self.after_idle(self._load_games_async)
 
     def _build_layout(self):
         # Top toolbar
@@ -85,6 +104,7 @@ class ROMManagerApp(tb.Window):
         self.toolbar_search = tb.Entry(self.toolbar, width=30)
         self.toolbar_search.pack(side=tk.RIGHT, padx=10)
         self.toolbar_search.bind('<Return>', lambda e: self.filter_games())
+        self.toolbar_search.bind('<KeyRelease>', self._schedule_filter)
         self.toolbar_search.bind('<Control-f>', lambda e: self.toolbar_search.focus_set())
         # Filters (system, genre, verification)
         self.filter_system = tb.Combobox(self.toolbar, values=['All Systems'], width=12, state='readonly')
@@ -96,12 +116,15 @@ class ROMManagerApp(tb.Window):
         self.filter_status = tb.Combobox(self.toolbar, values=['All Status'], width=12, state='readonly')
         self.filter_status.set('All Status')
         self.filter_status.pack(side=tk.RIGHT, padx=5)
+        for combo in (self.filter_system, self.filter_genre, self.filter_status):
+            combo.bind('<<ComboboxSelected>>', lambda e: self.filter_games())
 
     def _build_sidebar(self):
         # Search bar
-        search = tb.Entry(self.sidebar, width=18)
-        search.pack(padx=10, pady=10)
-        search.bind('<Return>', lambda e: self.filter_games())
+        self.sidebar_search = tb.Entry(self.sidebar, width=18)
+        self.sidebar_search.pack(padx=10, pady=10)
+        self.sidebar_search.bind('<Return>', lambda e: self.filter_games())
+        self.sidebar_search.bind('<KeyRelease>', self._schedule_filter)
         # Collapsible categories
         self.sidebar_tree = ttk.Treeview(self.sidebar, show='tree', selectmode='browse', height=30)
         self.sidebar_tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -122,33 +145,135 @@ class ROMManagerApp(tb.Window):
         add_system_btn.pack(pady=5)
 
     def _get_icon(self, filename):
-        # Placeholder: returns a blank image for now
-        img = Image.new('RGBA', (32, 32), (20, 30, 40, 255))
-        return ImageTk.PhotoImage(img)
+        # Placeholder: returns a blank image for now. A plain Tk image, so
+        # drawing the sidebar does not import PIL; kept so Tk keeps showing it
+        if filename not in self._icons:
+            img = tk.PhotoImage(width=32, height=32)
+            img.put('#141e28', to=(0, 0, 32, 32))
+            self._icons[filename] = img
+        return self._icons[filename]
 
     def _build_game_grid(self):
-        self.canvas = tk.Canvas(self.grid_frame, bg='#181c22', highlightthickness=0)
+        self.canvas = tk.Canvas(self.grid_frame, bg='#181c22', highlightthickness=0, yscrollincrement=SCROLL_STEP)
+        self.grid_scrollbar = tb.Scrollbar(self.grid_frame, orient=tk.VERTICAL, command=self._on_grid_scroll)
+        self.grid_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.configure(yscrollcommand=self.grid_scrollbar.set)
         self.canvas.pack(fill=tk.BOTH, expand=True)
-        self.canvas.bind('<Configure>', lambda e: self._draw_game_grid())
+        self.canvas.bind('<Configure>', self._on_grid_configure)
+        self.canvas.bind('<MouseWheel>', lambda e: self._scroll_grid(-3 if e.delta > 0 else 3))
+        self.canvas.bind('<Button-4>', lambda e: self._scroll_grid(-3))
+        self.canvas.bind('<Button-5>', lambda e: self._scroll_grid(3))
         self.canvas.bind('<Double-Button-1>', self._on_game_double_click)
         self.canvas.bind('<Button-3>', self._on_game_right_click)
+        # Virtualized grid: canvas items exist only for visible rows (plus
+        # overscan) and are recycled as the view scrolls
+        self._grid_cols = 0
+        self._tiles = {}  # game index -> tile
+        self._free_tiles = []
+        self._placeholder_games = [{'title': f"Game {i+1}"} for i in range(12)]
+
+    def _grid_games(self):
+        return self.filtered_games if self.games else self._placeholder_games
+
+    def _on_grid_configure(self, event):
+        if max(1, event.width // TILE_WIDTH) != self._grid_cols:
+            self._draw_game_grid()
+        else:
+            self._render_visible_tiles()
+
+    def _on_grid_scroll(self, *args):
+        self.canvas.yview(*args)
+        self._render_visible_tiles()
+
+    def _scroll_grid(self, units):
+        self.canvas.yview_scroll(units, 'units')
+        self._render_visible_tiles()
 
     def _draw_game_grid(self):
-        # Placeholder: draws a grid of rectangles for games
-        self.canvas.delete('all')
+        # Recompute the virtual scroll region and re-assign every tile
+        self._grid_generation += 1
+        for index in list(self._tiles):
+            self._release_tile(index)
         w = self.canvas.winfo_width()
-        h = self.canvas.winfo_height()
-        cols = max(1, w // (COVER_SIZE[0] + 30))
-        for i in range(12):
-            row, col = divmod(i, cols)
-            x = 30 + col * (COVER_SIZE[0] + 30)
-            y = 30 + row * (COVER_SIZE[1] + 40)
-            self.canvas.create_rectangle(x, y, x+COVER_SIZE[0], y+COVER_SIZE[1], outline=HIGHLIGHT_COLOR, width=2)
-            self.canvas.create_text(x+COVER_SIZE[0]//2, y+COVER_SIZE[1]+15, text=f"Game {i+1}", fill='white', font=('Segoe UI', 12))
+        self._grid_cols = max(1, w // TILE_WIDTH)
+        rows = -(-len(self._grid_games()) // self._grid_cols)
+        self.canvas.configure(scrollregion=(0, 0, w, 2 * GRID_MARGIN + rows * TILE_HEIGHT))
+        self._render_visible_tiles()
+
+    def _render_visible_tiles(self):
+        games = self._grid_games()
+        cols = max(1, self._grid_cols)
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(0, int((top - GRID_MARGIN) // TILE_HEIGHT) - OVERSCAN_ROWS)
+        last_row = int((bottom - GRID_MARGIN) // TILE_HEIGHT) + OVERSCAN_ROWS
+        visible = range(first_row * cols, min(len(games), (last_row + 1) * cols))
+        for index in [i for i in self._tiles if i not in visible]:
+            self._release_tile(index)
+        for index in visible:
+            if index not in self._tiles:
+                self._assign_tile(index, games[index])
+
+    def _release_tile(self, index):
+        tile = self._tiles.pop(index)
+        for item in (tile['rect'], tile['text'], tile['image']):
+            self.canvas.itemconfigure(item, state='hidden')
+        tile['photo'] = None
+        self._free_tiles.append(tile)
+
+    def _assign_tile(self, index, game):
+        if self._free_tiles:
+            tile = self._free_tiles.pop()
+        else:
+            tile = {
+                'rect': self.canvas.create_rectangle(0, 0, 0, 0, outline=HIGHLIGHT_COLOR, width=2),
+                'text': self.canvas.create_text(0, 0, fill='white', font=('Segoe UI', 12)),
+                'image': self.canvas.create_image(0, 0),
+            }
+        row, col = divmod(index, self._grid_cols)
+        x = GRID_MARGIN + col * TILE_WIDTH
+        y = GRID_MARGIN + row * TILE_HEIGHT
+        self.canvas.coords(tile['rect'], x, y, x+COVER_SIZE[0], y+COVER_SIZE[1])
+        self.canvas.coords(tile['text'], x+COVER_SIZE[0]//2, y+COVER_SIZE[1]+15)
+        self.canvas.coords(tile['image'], x+COVER_SIZE[0]//2, y+COVER_SIZE[1]//2)
+        self.canvas.itemconfigure(tile['rect'], state='normal')
+        self.canvas.itemconfigure(tile['text'], text=game['title'], state='normal')
+        self.canvas.itemconfigure(tile['image'], image='', state='hidden')
+        tile['photo'] = None
+        self._tiles[index] = tile
+        if game.get('cover'):
+            self._draw_cover(index, game['cover'])
+
+    def _draw_cover(self, index, cover_path):
+        # Thumbnails load in the background; draw now if cached, else when
+        # ready and the tile still shows the same game
+        generation = self._grid_generation
+        def place(photo):
+            tile = self._tiles.get(index)
+            if generation != self._grid_generation or tile is None:
+                return
+            tile['photo'] = photo
+            self.canvas.itemconfigure(tile['image'], image=photo, state='normal')
+        photo = self.cover_cache.get(cover_path, COVER_SIZE, place)
+        if photo is not None:
+            place(photo)
+
+    def _game_at(self, event):
+        x = self.canvas.canvasx(event.x) - GRID_MARGIN
+        y = self.canvas.canvasy(event.y) - GRID_MARGIN
+        if x < 0 or y < 0 or x // TILE_WIDTH >= self._grid_cols:
+            return None
+        index = int(y // TILE_HEIGHT) * self._grid_cols + int(x // TILE_WIDTH)
+        games = self._grid_games()
+        return games[index] if index < len(games) else None
 
     def _on_game_double_click(self, event):
         # Placeholder: Launch game
-        messagebox.showinfo('Launch', 'Launching game...')
+        game = self._game_at(event)
+        if game is None:
+            return
+        self.selected_game = game
+        messagebox.showinfo('Launch', f"Launching {game['title']}...")
 
     def _on_game_right_click(self, event):
         # Placeholder: Context menu
@@ -176,8 +301,8 @@ class ROMManagerApp(tb.Window):
         tb.Button(btn_frame, text='Edit Metadata').pack(side=tk.LEFT, padx=5)
 
     def _build_status_bar(self):
-        stats = tb.Label(self.status_bar, text='42,000 games | 12TB', bootstyle=SECONDARY)
-        stats.pack(side=tk.LEFT, padx=10)
+        self.stats_label = tb.Label(self.status_bar, text='Loading library...', bootstyle=SECONDARY)
+        self.stats_label.pack(side=tk.LEFT, padx=10)
         sync = tb.Label(self.status_bar, text='DB: Synced', bootstyle=SUCCESS)
         sync.pack(side=tk.RIGHT, padx=10)
         self.status_progress = tb.Progressbar(self.status_bar, length=200, bootstyle=INFO)
@@ -185,14 +310,96 @@ class ROMManagerApp(tb.Window):
 
     @async_load
     def _load_games_async(self):
-        # Placeholder: Simulate loading
-        import time
-        time.sleep(1)
-        # Would load games and covers here
-        self._draw_game_grid()
+        # The catalog connection belongs to this worker thread, and the
+        # search index is built here too so the UI never stalls on it; the
+        # grid is updated back on the Tk thread
+        with Catalog() as catalog:
+            games = catalog.games()
+        search_index = SearchIndex(dict(enumerate(games)))
+        self.after(0, lambda: self.set_games(games, search_index))
+
+    def set_games(self, games, search_index=None):
+        # Replaces the library; games are numbered from 0, which is how a
+        # prebuilt search_index must number them
+        self.games = dict(enumerate(games))
+        self._next_game_id = len(self.games)
+        self.search_index = search_index if search_index is not None else SearchIndex(self.games)
+        self._update_stats()
+        self.filter_games()
+        self.cover_cache.pregenerate({g['cover'] for g in games if g.get('cover')})
+
+    def _update_stats(self):
+        total_bytes = sum(g.get('size') or 0 for g in self.games.values())
+        self.stats_label.configure(text=f"{len(self.games):,} games | {total_bytes / 1024 ** 4:.1f}TB")
+
+    def add_game(self, game, refresh=True):
+        game_id = self._next_game_id
+        self._next_game_id += 1
+        self.games[game_id] = game
+        self.search_index.add(game_id, game)
+        if refresh:
+            self._update_stats()
+            self._schedule_filter()
+        return game_id
+
+    def remove_game(self, game_id):
+        self.games.pop(game_id, None)
+        self.search_index.remove(game_id)
+        self._update_stats()
+        self._schedule_filter()
+
+    def _filter_combos(self):
+        return ((self.filter_system, 'system', 'All Systems'),
+                (self.filter_genre, 'genre', 'All Genres'),
+                (self.filter_status, 'status', 'All Status'))
+
+    def _combo_value(self, combo, everything):
+        label = combo.get()
+        if label == everything:
+            return None
+        return self._combo_labels.get(combo, {}).get(label, label)
+
+    def _refresh_filter_values(self, counts):
+        # Show how many games each choice would leave given the other filters
+        for combo, field, everything in self._filter_combos():
+            selected = self._combo_value(combo, everything)
+            labels = {}
+            for value, n in sorted(counts.get(field, {}).items()):
+                if n or value == selected:
+                    labels[f"{value} ({n:,})"] = value
+            self._combo_labels[combo] = labels
+            combo.configure(values=[everything] + list(labels))
+            if selected is not None:
+                combo.set(next((l for l, v in labels.items() if v == selected), everything))
+
+    def _schedule_filter(self, event=None):
+        # Debounce as-you-type searches
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(SEARCH_DEBOUNCE_MS, self.filter_games)
+
+    def _selected_system(self):
+        value = self._combo_value(self.filter_system, 'All Systems')
+        if value is not None:
+            return value
+        selection = self.sidebar_tree.selection()
+        if selection and self.sidebar_tree.parent(selection[0]):
+            return self.sidebar_tree.item(selection[0], 'text')
+        return None
 
     def filter_games(self):
-        # Placeholder: Would filter games based on search/filters
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
+        text = f"{self.toolbar_search.get()} {self.sidebar_search.get()}"
+        filters = {
+            'system': self._selected_system(),
+            'genre': self._combo_value(self.filter_genre, 'All Genres'),
+            'status': self._combo_value(self.filter_status, 'All Status')
+        }
+        bits, counts = self.search_index.faceted_search(text, **filters)
+        self.filtered_games = [self.games[i] for i in iter_ids(bits)]
+        self._refresh_filter_values(counts)
         self._draw_game_grid()
 
     def scan_folder(self):
@@ -248,6 +455,7 @@ class ROMManagerApp(tb.Window):
         # Save UI state
         self.ui_state['favorites'] = list(self.favorites)
         save_ui_state(self.ui_state)
+        self.cover_cache.close()
         self.destroy()
 
 if __name__ == '__main__':
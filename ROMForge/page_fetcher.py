@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_session import ThrottledSession
+
+# HTTP GETs for the scrapers: one throttled session shared by all worker
+# threads (per-host spacing and retries, see http_session.py) and an
+# on-disk cache. Cached pages
+# are revalidated with If-None-Match / If-Modified-Since, so a rerun costs
+# a 304 per page instead of a download. With offline=True pages are served
+# from the cache only, which makes a cache directory usable as a recorded
+# fixture set.
+
+CACHE_DIR = 'ROMForge/.http_cache'
+USER_AGENT = 'ROMForge/1.0 (console metadata scraper; python-requests)'
+
+class PageNotCached(LookupError):
+    pass
+
+class PageFetcher:
+    def __init__(self, cache_dir=CACHE_DIR, workers=4, host_interval=0.5, retries=3, backoff=1.0,
+                 timeout=30, max_age=24 * 3600, offline=False):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.offline = offline
+        self.http = ThrottledSession(workers, USER_AGENT, host_interval, retries, backoff, timeout)
+        self.stats = {'fresh': 0, 'revalidated': 0, 'downloaded': 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def close(self):
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Cache ---
+
+    def _cache_paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def _read_cache(self, url):
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _write_cache(self, url, resp, body):
+        meta_path, body_path = self._cache_paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        meta = {
+            'url': url,
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+            'encoding': resp.encoding,
+            'fetched_at': time.time()
+        }
+        suffix = f".{threading.get_ident()}.tmp"
+        with open(body_path + suffix, 'wb') as f:
+            f.write(body)
+        os.replace(body_path + suffix, body_path)
+        with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+        return meta
+
+    def _touch_cache(self, url, meta):
+        meta = dict(meta, fetched_at=time.time())
+        meta_path, _ = self._cache_paths(url)
+        tmp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    # --- Fetching ---
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def get_text(self, url):
+        # Page body as text, from the cache when it is fresh or unchanged
+        meta, body = self._read_cache(url)
+        if self.offline:
+            if meta is None:
+                raise PageNotCached(url)
+            self._count('fresh')
+            return body.decode(meta.get('encoding') or 'utf-8', 'replace')
+        if meta is not None and time.time() - meta.get('fetched_at', 0) < self.max_age:
+            self._count('fresh')
+            return body.decode(meta.get('encoding') or 'utf-8', 'replace')
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        resp = self.http.get(url, headers=headers)
+        if resp.status_code == 304 and meta is not None:
+            self._touch_cache(url, meta)
+            self._count('revalidated')
+            return body.decode(meta.get('encoding') or 'utf-8', 'replace')
+        resp.raise_for_status()
+        meta = self._write_cache(url, resp, resp.content)
+        self._count('downloaded')
+        return resp.content.decode(meta.get('encoding') or 'utf-8', 'replace')
+
+    def summary(self):
+        s = self.stats
+        return (f"Pages: {s['downloaded']} downloaded, {s['revalidated']} unchanged (304), "
+                f"{s['fresh']} from cache, {self.http.retry_count} retries")
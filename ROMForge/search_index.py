@@ -0,0 +1,129 @@
+import re
+import bisect
+import unicodedata
+from bitmap_index import BitmapIndex, ids_to_bits, iter_ids
+
+# In-memory search over the game library. Each game is split into
+# normalized tokens; a sorted token list answers prefix queries with
+# bisect and a trigram -> tokens map answers substring queries. Facet
+# fields live in a BitmapIndex so combo filters and their live counts are
+# bitset operations.
+
+FIELDS = ('title', 'system', 'genre', 'region', 'status')
+FACETS = ('system', 'genre', 'region', 'status')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+class SearchIndex:
+    def __init__(self, games=None):
+        self.games = {}  # id -> game dict
+        self.postings = {}  # token -> ids
+        self.sorted_tokens = []
+        self.trigram_tokens = {}  # trigram -> tokens
+        self.facets = BitmapIndex(FACETS)
+        self._game_tokens = {}
+        if games:
+            # Bulk build: sort the token list once instead of inserting
+            # each new token in place
+            for game_id, game in games.items():
+                self._add_tokens(game_id, game, bulk=True)
+            self.sorted_tokens = sorted(self.postings)
+            self.facets.add_many((game_id, self._facet_values(game)) for game_id, game in games.items())
+
+    def __len__(self):
+        return len(self.games)
+
+    @staticmethod
+    def _facet_values(game):
+        return {f: game.get(f) or 'Unknown' for f in FACETS}
+
+    def add(self, game_id, game):
+        self._add_tokens(game_id, game)
+        self.facets.add(game_id, self._facet_values(game))
+
+    def _add_tokens(self, game_id, game, bulk=False):
+        if game_id in self.games:
+            self.remove(game_id)
+        self.games[game_id] = game
+        tokens = set()
+        for field in FIELDS:
+            if game.get(field):
+                tokens.update(tokenize(game[field]))
+        self._game_tokens[game_id] = tokens
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                if not bulk:
+                    bisect.insort(self.sorted_tokens, token)
+                for tri in trigrams(token):
+                    self.trigram_tokens.setdefault(tri, set()).add(token)
+            ids.add(game_id)
+
+    def remove(self, game_id):
+        game = self.games.pop(game_id, None)
+        if game is None:
+            return
+        for token in self._game_tokens.pop(game_id):
+            ids = self.postings[token]
+            ids.discard(game_id)
+            if not ids:
+                del self.postings[token]
+                del self.sorted_tokens[bisect.bisect_left(self.sorted_tokens, token)]
+                for tri in trigrams(token):
+                    self.trigram_tokens[tri].discard(token)
+                    if not self.trigram_tokens[tri]:
+                        del self.trigram_tokens[tri]
+        self.facets.remove(game_id)
+
+    def _matching_tokens(self, term):
+        matches = set()
+        i = bisect.bisect_left(self.sorted_tokens, term)
+        while i < len(self.sorted_tokens) and self.sorted_tokens[i].startswith(term):
+            matches.add(self.sorted_tokens[i])
+            i += 1
+        if len(term) >= 3:
+            grams = sorted(trigrams(term), key=lambda g: len(self.trigram_tokens.get(g, ())))
+            candidates = set(self.trigram_tokens.get(grams[0], ()))
+            for gram in grams[1:]:
+                candidates &= self.trigram_tokens.get(gram, set())
+            matches.update(t for t in candidates if term in t)
+        return matches
+
+    def facet_values(self, field):
+        return sorted(self.facets.values(field))
+
+    def _text_bits(self, text):
+        # Bitmap of ids matching every term, or None when text has no terms
+        result = None
+        for term in sorted(set(tokenize(text)), key=len, reverse=True):
+            ids = set()
+            for token in self._matching_tokens(term):
+                ids |= self.postings[token]
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return None if result is None else ids_to_bits(result)
+
+    def search_bits(self, text='', **filters):
+        # Bitmap of ids matching every term of text (prefix or substring)
+        # and every facet filter given as field=value
+        return self.facets.filter(filters, base=self._text_bits(text))
+
+    def search(self, text='', **filters):
+        return set(iter_ids(self.search_bits(text, **filters)))
+
+    def faceted_search(self, text='', **filters):
+        # (bitmap of matching ids, {field: {value: count}}) where each
+        # field's counts honour the text and every other filter
+        base = self._text_bits(text)
+        return self.facets.filter(filters, base), self.facets.facet_counts(filters, base)
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+import bisect
+from bitmap_index import BitmapIndex, ids_to_bits, iter_ids
+
+# Compiled index over every *_metadata.json under ROMForge/Consoles
+# (console_metadata.json, ...; the kind is the file name prefix) and over
+# the entries of each console's games.json from wikipedia_console_scraper
+# (kind 'game', with the console folder name as 'console'). The parsed
+# metadata and the mtime of every directory and metadata file are saved in
+# one JSON file; it is rebuilt only when one of those mtimes changes, so queries
+# never re-open the metadata files. Queries are answered from an in-memory
+# BitmapIndex, which also gives per-value counts for the current result:
+#
+#     manufacturer:nintendo AND (generation:4..6 OR tags:handheld)
+#     type:"home console" NOT architecture:8-bit
+#
+# String matching is case-insensitive, list values match any element,
+# key:lo..hi (either end optional) selects numeric ranges, and adjacent
+# terms are ANDed.
+
+CONSOLES_ROOT = 'ROMForge/Consoles/'
+INDEX_PATH = 'ROMForge/metadata_index.json'
+INDEX_VERSION = 2
+METADATA_SUFFIX = '_metadata.json'
+GAMES_FILENAME = 'games.json'
+QUERY_TOKEN_RE = re.compile(r'\s*(\(|\)|[^\s()":]+:"[^"]*"|"[^"]*"|[^\s()]+)')
+
+def normalize_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value).strip().lower()
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _scan_tree(root):
+    # ({dir: mtime_ns}, {metadata file: mtime_ns}) from stat calls only
+    dirs = {}
+    files = {}
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            dirs[path] = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.name.endswith(METADATA_SUFFIX) or entry.name == GAMES_FILENAME:
+                try:
+                    files[entry.path] = entry.stat().st_mtime_ns
+                except OSError:
+                    pass
+    return dirs, files
+
+class QueryError(ValueError):
+    pass
+
+class MetadataIndex:
+    def __init__(self, root=CONSOLES_ROOT, index_path=INDEX_PATH):
+        self.root = os.path.normpath(root)
+        self.index_path = index_path
+        self.entries = []  # {'path': dir, 'kind': 'console', 'meta': {...}}
+        self.bitmap = BitmapIndex()
+        self.numeric = {}  # key -> (sorted values, bitmap per value)
+        self.load()
+
+    # --- Building ---
+
+    def load(self):
+        # Use the compiled file when every recorded mtime still matches
+        dirs, files = _scan_tree(self.root)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (data.get('version') == INDEX_VERSION and data.get('root') == self.root
+                    and data.get('dirs') == dirs and data.get('files') == files):
+                self._compile(data['entries'])
+                return False
+        except (OSError, ValueError, KeyError):
+            pass
+        self._build(dirs, files)
+        return True
+
+    refresh = load
+
+    def _build(self, dirs, files):
+        entries = []
+        for path in sorted(files):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable metadata {path}: {e}")
+                continue
+            folder, name = os.path.split(path)
+            if name == GAMES_FILENAME:
+                if isinstance(meta, list):
+                    console = os.path.basename(folder)
+                    entries += [{'path': folder, 'kind': 'game', 'meta': dict({'console': console}, **game)}
+                                for game in meta if isinstance(game, dict)]
+            elif isinstance(meta, dict):
+                entries.append({'path': folder, 'kind': name[:-len(METADATA_SUFFIX)], 'meta': meta})
+        self._compile(entries)
+        data = {'version': INDEX_VERSION, 'root': self.root, 'dirs': dirs, 'files': files, 'entries': entries}
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _compile(self, entries):
+        self.entries = entries
+        self.bitmap = BitmapIndex()
+        records = []
+        numbers = {}
+        for i, entry in enumerate(entries):
+            record = {}
+            for key, value in dict(entry['meta'], kind=entry['kind']).items():
+                key = key.lower()
+                values = [v for v in (value if isinstance(value, list) else [value])
+                          if v is not None and not isinstance(v, (dict, list))]
+                record[key] = [normalize_value(v) for v in values]
+                for v in values:
+                    n = _number(v)
+                    if n is not None:
+                        numbers.setdefault(key, {}).setdefault(n, []).append(i)
+            records.append((i, record))
+        self.bitmap.add_many(records)
+        self.numeric = {}
+        for key, by_number in numbers.items():
+            ordered = sorted(by_number)
+            self.numeric[key] = (ordered, [ids_to_bits(by_number[n]) for n in ordered])
+
+    # --- Queries ---
+
+    def __len__(self):
+        return len(self.entries)
+
+    def all_bits(self):
+        return self.bitmap.all_bits
+
+    def match(self, key, value):
+        # Bitmap of entries whose key equals value (any element for lists)
+        return self.bitmap.match(key.lower(), normalize_value(value))
+
+    def range(self, key, low=None, high=None):
+        ordered, bitmaps = self.numeric.get(key.lower(), ([], []))
+        start = 0 if low is None else bisect.bisect_left(ordered, low)
+        stop = len(ordered) if high is None else bisect.bisect_right(ordered, high)
+        bits = 0
+        for i in range(start, stop):
+            bits |= bitmaps[i]
+        return bits
+
+    def values(self, key):
+        # {normalized value: number of entries}
+        return self.counts(fields=[key])[key.lower()]
+
+    def counts(self, bits=None, fields=None):
+        # {key: {value: count}} over the entries in bits (default: all)
+        fields = None if fields is None else [f.lower() for f in fields]
+        return self.bitmap.facet_counts(base=bits, fields=fields)
+
+    def results(self, bits):
+        # (directory, metadata) pairs in path order, like the old walkers
+        return [(self.entries[i]['path'], self.entries[i]['meta']) for i in iter_ids(bits)]
+
+    def _term(self, token):
+        key, sep, value = token.partition(':')
+        if not sep or not key:
+            raise QueryError(f"expected key:value, got {token!r}")
+        value = value.strip('"')
+        low, dots, high = value.partition('..')
+        if dots:
+            try:
+                return self.range(key, float(low) if low else None, float(high) if high else None)
+            except ValueError:
+                raise QueryError(f"bad range in {token!r}")
+        return self.match(key, value)
+
+    def query(self, text):
+        # Returns the bitmap of entries matching the query string
+        tokens = QUERY_TOKEN_RE.findall(text)
+        pos = 0
+
+        def peek():
+            return tokens[pos] if pos < len(tokens) else None
+
+        def take():
+            nonlocal pos
+            pos += 1
+            return tokens[pos - 1]
+
+        def parse_or():
+            bits = parse_and()
+            while peek() is not None and peek().upper() == 'OR':
+                take()
+                bits |= parse_and()
+            return bits
+
+        def parse_and():
+            bits = parse_not()
+            while peek() is not None and peek() != ')' and peek().upper() != 'OR':
+                if peek().upper() == 'AND':
+                    take()
+                bits &= parse_not()
+            return bits
+
+        def parse_not():
+            token = peek()
+            if token is None:
+                raise QueryError("unexpected end of query")
+            if token.upper() == 'NOT':
+                take()
+                return self.all_bits() & ~parse_not()
+            if token == '(':
+                take()
+                bits = parse_or()
+                if peek() != ')':
+                    raise QueryError("missing closing parenthesis")
+                take()
+                return bits
+            return self._term(take())
+
+        if not tokens:
+            return self.all_bits()
+        bits = parse_or()
+        if pos != len(tokens):
+            raise QueryError(f"unexpected {tokens[pos]!r}")
+        return bits
+
+    def search(self, text):
+        return self.results(self.query(text))
+
+_indexes = {}
+
+def get_index(root=CONSOLES_ROOT, index_path=INDEX_PATH):
+    # One MetadataIndex per root for the life of the process
+    key = (os.path.normpath(root), index_path)
+    if key not in _indexes:
+        _indexes[key] = MetadataIndex(root, index_path)
+    return _indexes[key]
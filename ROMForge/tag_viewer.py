@@ -1,7 +1,10 @@
-import os
+import sys
 import json
 import csv
 from pathlib import Path
+from tag_index import get_index, QueryError
+
+TAG_DATABASE = 'ROMForge/tag_database.json'
 
 def load_metadata(console_dir):
     meta_path = Path(console_dir) / 'console_metadata.json'
@@ -10,23 +13,36 @@ def load_metadata(console_dir):
             return json.load(f)
     return None
 
+# Queries are answered from the compiled metadata index (tag_index.py)
+# instead of walking the tree and re-reading every metadata file.
+
 def filter_consoles_by_tag(root, tag_key, tag_value):
-    results = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        if 'console_metadata.json' in filenames:
-            meta = load_metadata(dirpath)
-            if meta and meta.get(tag_key) == tag_value:
-                results.append((dirpath, meta))
-    return results
+    index = get_index(root)
+    return index.results(index.match(tag_key, tag_value) & index.match('kind', 'console'))
 
 def search_by_manufacturer(root, manufacturer):
-    results = []
-    for dirpath, dirnames, filenames in os.walk(root):
-        if 'console_metadata.json' in filenames:
-            meta = load_metadata(dirpath)
-            if meta and meta.get('manufacturer', '').lower() == manufacturer.lower():
-                results.append((dirpath, meta))
-    return results
+    return filter_consoles_by_tag(root, 'manufacturer', manufacturer)
+
+def query_metadata(root, text):
+    return get_index(root).search(text)
+
+def tag_counts(root, text=''):
+    # Per-value counts for manufacturer, tags and the tag_database
+    # categories, restricted to the entries matching text
+    fields = ['manufacturer', 'tags']
+    try:
+        with open(TAG_DATABASE, 'r', encoding='utf-8') as f:
+            fields += [c for c in json.load(f).get('tag_categories', {}) if c not in fields]
+    except (OSError, ValueError):
+        pass
+    index = get_index(root)
+    return index.counts(index.query(text), fields)
+
+def print_counts(counts):
+    for field, values in counts.items():
+        shown = sorted(((v, n) for v, n in values.items() if n), key=lambda item: (-item[1], item[0]))
+        if shown:
+            print(f"{field}: " + ' / '.join(f"{v}: {n:,}" for v, n in shown))
 
 def output_results(results, out_format='csv', out_file=None):
     if out_format == 'csv':
@@ -67,10 +83,11 @@ def main():
     print("3. Search by generation")
     print("4. Output to CSV")
     print("5. Output to JSON")
+    print("6. Compound query (e.g. manufacturer:sega AND generation:4..6)")
+    print("7. Tag counts (optionally within a query)")
     choice = input("Select an option: ").strip()
     if choice == '1':
-        results = filter_consoles_by_tag(root, 'architecture', '16-bit')
-        results = [r for r in results if r[1].get('type') == 'handheld']
+        results = query_metadata(root, 'kind:console AND architecture:16-bit AND type:handheld')
         output_results(results)
     elif choice == '2':
         mfg = input("Enter manufacturer: ")
@@ -90,6 +107,18 @@ def main():
         val = input("Tag value: ")
         results = filter_consoles_by_tag(root, tag, val)
         output_results(results, out_format='json', out_file='ROMForge/Reports/tag_view.json')
+    elif choice == '6':
+        try:
+            results = query_metadata(root, input("Query: "))
+        except QueryError as e:
+            print(f"Invalid query: {e}")
+            return
+        output_results(results)
+    elif choice == '7':
+        try:
+            print_counts(tag_counts(root, input("Query (blank for all): ")))
+        except QueryError as e:
+            print(f"Invalid query: {e}")
     else:
         print("Invalid option.")
 
@@ -1,27 +1,35 @@
 import os
-import requests
 import pandas as pd
-from bs4 import BeautifulSoup
 from pathlib import Path
 import re
 import json
-from time import sleep
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from page_fetcher import PageFetcher, CACHE_DIR
+from wikitable import parse_wikitables, iter_links, row_dict
 
-def get_console_tables(url):
-    resp = requests.get(url)
-    soup = BeautifulSoup(resp.text, 'html.parser')
-    # Find all tables with class 'wikitable'
-    tables = soup.find_all('table', {'class': 'wikitable'})
-    return tables
+CONSOLE_LIST_URL = 'https://en.wikipedia.org/wiki/List_of_video_game_consoles'
+CHECKPOINT_PATH = 'ROMForge/.scrape_checkpoint.json'
+
+_fetcher = None
+
+def get_fetcher():
+    # Shared fetcher for callers that do not pass their own
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = PageFetcher()
+    return _fetcher
+
+def get_console_tables(url, fetcher=None):
+    # Only the 'wikitable' tables are parsed, into Table tuples
+    return parse_wikitables((fetcher or get_fetcher()).get_text(url))
 
 def parse_console_table(table, category):
     consoles = []
-    headers = [th.get_text(strip=True) for th in table.find('tr').find_all('th')]
-    for row in table.find_all('tr')[1:]:
-        cols = row.find_all(['td', 'th'])
+    for cols in table.rows:
         if len(cols) < 2:
             continue
-        data = {h: (cols[i].get_text(strip=True) if i < len(cols) else '') for i, h in enumerate(headers)}
+        data = row_dict(table.headers, cols)
         # Extract fields
         name = data.get('Name') or data.get('Console') or data.get('System') or ''
         manufacturer = data.get('Manufacturer') or data.get('Maker') or ''
@@ -35,8 +43,8 @@ def parse_console_table(table, category):
         gen_match = re.search(r'(\d+)[a-z]{2}', gen.lower())
         generation = f"{gen_match.group(1)}-bit" if gen_match else gen
         # Find Wikipedia link
-        link = cols[0].find('a')
-        wiki_url = f"https://en.wikipedia.org{link['href']}" if link and link.has_attr('href') else ''
+        href = cols[0].href
+        wiki_url = f"https://en.wikipedia.org{href}" if href else ''
         consoles.append({
             'name': name,
             'manufacturer': manufacturer,
@@ -48,57 +56,94 @@ def parse_console_table(table, category):
         })
     return consoles
 
-def get_game_list(wiki_url):
-    # Try to find a 'List of ... games' link on the console's Wikipedia page
+def find_game_list_url(html):
+    # Look for links like 'List of ... games' on a console's page
+    for text, games_url in iter_links(html):
+        if text.lower().startswith('list of') and 'game' in text.lower():
+            if not games_url.startswith('http'):
+                games_url = 'https://en.wikipedia.org' + games_url
+            return games_url
+    return None
+
+def parse_game_list(html):
+    games = []
+    # Try to find wikitable(s) with game lists
+    for table in parse_wikitables(html):
+        for cols in table.rows:
+            if len(cols) < 2:
+                continue
+            data = row_dict(table.headers, cols)
+            title = data.get('Title') or data.get('Game') or data.get('Name') or ''
+            if not title:
+                continue
+            games.append({
+                'title': title,
+                'developer': data.get('Developer', ''),
+                'publisher': data.get('Publisher', ''),
+                'release_date': data.get('Release date', '') or data.get('Release', ''),
+                'genre': data.get('Genre', ''),
+                'region': data.get('Region', ''),
+            })
+    return games
+
+def fetch_games(wiki_url, fetcher):
+    # Raises on fetch errors so a failed console is retried on resume
+    games_url = find_game_list_url(fetcher.get_text(wiki_url))
+    if not games_url:
+        return []
+    print(f"  Scraping games from: {games_url}")
+    return parse_game_list(fetcher.get_text(games_url))
+
+def get_game_list(wiki_url, fetcher=None):
     try:
-        resp = requests.get(wiki_url)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        # Look for links like 'List of ... games'
-        for a in soup.find_all('a', href=True):
-            if a.text.lower().startswith('list of') and 'game' in a.text.lower():
-                games_url = a['href']
-                if not games_url.startswith('http'):
-                    games_url = 'https://en.wikipedia.org' + games_url
-                return scrape_games_from_list(games_url)
+        return fetch_games(wiki_url, fetcher or get_fetcher())
     except Exception as e:
         print(f"Could not get games for {wiki_url}: {e}")
     return []
 
-def scrape_games_from_list(games_url):
+def scrape_games_from_list(games_url, fetcher=None):
     print(f"  Scraping games from: {games_url}")
     try:
-        resp = requests.get(games_url)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        games = []
-        # Try to find wikitable(s) with game lists
-        tables = soup.find_all('table', {'class': 'wikitable'})
-        for table in tables:
-            headers = [th.get_text(strip=True) for th in table.find('tr').find_all('th')]
-            for row in table.find_all('tr')[1:]:
-                cols = row.find_all(['td', 'th'])
-                if len(cols) < 2:
-                    continue
-                data = {h: (cols[i].get_text(strip=True) if i < len(cols) else '') for i, h in enumerate(headers)}
-                title = data.get('Title') or data.get('Game') or data.get('Name') or ''
-                if not title:
-                    continue
-                games.append({
-                    'title': title,
-                    'developer': data.get('Developer', ''),
-                    'publisher': data.get('Publisher', ''),
-                    'release_date': data.get('Release date', '') or data.get('Release', ''),
-                    'genre': data.get('Genre', ''),
-                    'region': data.get('Region', ''),
-                })
-        return games
+        return parse_game_list((fetcher or get_fetcher()).get_text(games_url))
     except Exception as e:
         print(f"    Failed to scrape games: {e}")
     return []
 
+def load_checkpoint(path, source):
+    # {wikipedia_url: game count} for consoles finished by an earlier run
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('done', {}) if data.get('source') == source else {}
+
+def save_checkpoint(path, source, done):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'source': source, 'done': done}, f)
+    os.replace(tmp_path, path)
+
+def save_games(folder, name, games):
+    if games:
+        with open(folder / 'games.json', 'w', encoding='utf-8') as f:
+            json.dump(games, f, indent=2)
+        print(f"  Saved {len(games)} games for {name}")
+
 def main():
-    url = 'https://en.wikipedia.org/wiki/List_of_video_game_consoles'
+    parser = argparse.ArgumentParser(description='Build console folders and game lists from Wikipedia')
+    parser.add_argument('--workers', type=int, default=4, help='consoles scraped in parallel')
+    parser.add_argument('--host-interval', type=float, default=0.5,
+                        help='minimum seconds between requests to one host')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='HTTP cache (also used as a fixture set)')
+    parser.add_argument('--offline', action='store_true', help='serve every page from the cache only')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint of an interrupted run')
+    args = parser.parse_args()
+    url = CONSOLE_LIST_URL
+    fetcher = PageFetcher(args.cache_dir, workers=args.workers, host_interval=args.host_interval,
+                          offline=args.offline)
     print('Fetching Wikipedia page...')
-    tables = get_console_tables(url)
+    tables = get_console_tables(url, fetcher)
     all_consoles = []
     # Table order: Home, Handheld, PC, Arcade (approximate)
     categories = ['Home', 'Handheld', 'PC', 'Arcade']
@@ -112,7 +157,12 @@ def main():
     out_dir.mkdir(parents=True, exist_ok=True)
     df.to_csv(out_dir / 'console_list.csv', index=False)
     df.to_json(out_dir / 'console_list.json', orient='records', indent=2)
-    # Organize folders and scrape games
+    # Organize folders, then scrape games for consoles not finished by an
+    # earlier run; the checkpoint is updated as each console completes
+    done = {} if args.restart else load_checkpoint(CHECKPOINT_PATH, url)
+    if done:
+        print(f"Resuming: {len(done)} consoles already scraped")
+    todo = {}
     for c in all_consoles:
         folder = out_dir / c['category'] / c['manufacturer'] / c['name']
         folder.mkdir(parents=True, exist_ok=True)
@@ -127,15 +177,35 @@ def main():
         with open(folder / 'console_metadata.json', 'w', encoding='utf-8') as f:
             json.dump(meta, f, indent=2)
         (folder / 'roms').mkdir(exist_ok=True)
-        # Scrape games and save as games.json
-        games = []
-        if c.get('wikipedia_url'):
-            games = get_game_list(c['wikipedia_url'])
-            sleep(1)  # Be polite to Wikipedia
-        if games:
-            with open(folder / 'games.json', 'w', encoding='utf-8') as f:
-                json.dump(games, f, indent=2)
-            print(f"  Saved {len(games)} games for {c['name']}")
+        if c.get('wikipedia_url') and c['wikipedia_url'] not in done:
+            todo.setdefault(c['wikipedia_url'], []).append((folder, c['name']))
+    failed = 0
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = {pool.submit(fetch_games, wiki_url, fetcher): wiki_url for wiki_url in todo}
+        for future in as_completed(futures):
+            wiki_url = futures[future]
+            try:
+                games = future.result()
+            except Exception as e:
+                print(f"Could not get games for {wiki_url}: {e}")
+                failed += 1
+                continue
+            for folder, name in todo[wiki_url]:
+                save_games(folder, name, games)
+            done[wiki_url] = len(games)
+            save_checkpoint(CHECKPOINT_PATH, url, done)
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun to resume ({len(done)} consoles saved in {CHECKPOINT_PATH}).")
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    fetcher.close()
+    print(fetcher.summary())
+    if failed:
+        print(f"{failed} consoles failed; rerun to retry them.")
+    elif os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
     print('Scraping and folder organization complete!')
 
 if __name__ == '__main__':
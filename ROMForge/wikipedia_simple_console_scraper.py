@@ -1,6 +1,6 @@
 import os
 import requests
-from bs4 import BeautifulSoup
+from wikitable import parse_wikitables
 
 WIKI_URL = 'https://en.wikipedia.org/wiki/Home_video_game_console#List_of_home_video_game_consoles'
 ROOT = 'ROMForge/Consoles'
@@ -11,31 +11,27 @@ def clean_name(name):
 def main():
     print('Fetching Wikipedia page...')
     resp = requests.get(WIKI_URL)
-    soup = BeautifulSoup(resp.text, 'html.parser')
     created = 0
     # Find all tables under the 'List of home video game consoles' section
-    tables = soup.find_all('table', {'class': 'wikitable'})
-    for table in tables:
-        # Get table headers
-        headers = [th.get_text(strip=True) for th in table.find('tr').find_all('th')]
-        for row in table.find_all('tr')[1:]:
-            cols = row.find_all('td')
+    for table in parse_wikitables(resp.text):
+        headers = table.headers
+        for row in table.rows:
+            cols = [c for c in row if c.tag == 'td']
             if len(cols) < 3:
                 continue
             # Extract fields
-            name = cols[0].get_text(strip=True)
-            manufacturer = cols[1].get_text(strip=True)
+            name = cols[0].text
+            manufacturer = cols[1].text
             generation = ''
             release_year = ''
             wiki_url = ''
             for i, h in enumerate(headers):
                 if 'generation' in h.lower():
-                    generation = cols[i].get_text(strip=True) if i < len(cols) else ''
+                    generation = cols[i].text if i < len(cols) else ''
                 if 'release' in h.lower():
-                    release_year = cols[i].get_text(strip=True) if i < len(cols) else ''
-            link = cols[0].find('a')
-            if link and link.has_attr('href'):
-                wiki_url = 'https://en.wikipedia.org' + link['href']
+                    release_year = cols[i].text if i < len(cols) else ''
+            if cols[0].href:
+                wiki_url = 'https://en.wikipedia.org' + cols[0].href
             # Skip if missing data
             if not (name and manufacturer and generation and release_year and wiki_url):
                 continue
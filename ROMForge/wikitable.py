@@ -0,0 +1,92 @@
+from collections import namedtuple
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Extracts Wikipedia "wikitable" tables into plain tuples without building
+# a tree for the whole page. lxml's C parser is used when it is installed;
+# otherwise BeautifulSoup builds only the wikitable subtrees (SoupStrainer).
+# Both paths follow the scrapers' BeautifulSoup semantics: headers are the
+# <th> cells of the first row, every later <tr> is a row, and a cell's text
+# is its stripped text fragments joined together (get_text(strip=True)).
+
+Cell = namedtuple('Cell', 'tag text href')  # href of the cell's first <a>, if any
+Table = namedtuple('Table', 'headers rows')  # headers: tuple of str, rows: list of Cell tuples
+
+SKIPPED_TAGS = ('script', 'style', 'template')
+
+def _has_wikitable_class(value):
+    return bool(value) and 'wikitable' in value.split()
+
+def _lxml_text(el):
+    # itertext() already skips comments; script/style subtrees are removed
+    # from each table before its cells are read
+    return ''.join(map(str.strip, el.itertext()))
+
+def _lxml_cell(cell):
+    link = next(cell.iter('a'), None)
+    return Cell(cell.tag, _lxml_text(cell), link.get('href') if link is not None else None)
+
+def _lxml_tables(document):
+    # Plain etree elements: lxml.html's element classes cost a Python
+    # lookup for every node touched
+    root = etree.HTML(document)
+    tables = []
+    if root is None:
+        return tables
+    for table in root.iter('table'):
+        if not _has_wikitable_class(table.get('class')):
+            continue
+        etree.strip_elements(table, *SKIPPED_TAGS, with_tail=False)
+        rows = list(table.iter('tr'))
+        if not rows:
+            continue
+        headers = tuple(_lxml_text(th) for th in rows[0].iter('th'))
+        body = [tuple(_lxml_cell(c) for c in tr.iter('td', 'th') if c is not tr) for tr in rows[1:]]
+        tables.append(Table(headers, body))
+    return tables
+
+def _soup_cell(cell):
+    link = cell.find('a')
+    return Cell(cell.name, cell.get_text(strip=True), link.get('href') if link is not None else None)
+
+def _soup_tables(document):
+    from bs4 import BeautifulSoup, SoupStrainer
+    only = SoupStrainer('table', class_=_has_wikitable_class)
+    soup = BeautifulSoup(document, 'html.parser', parse_only=only)
+    tables = []
+    for table in soup.find_all('table', class_=_has_wikitable_class):
+        rows = table.find_all('tr')
+        if not rows:
+            continue
+        headers = tuple(th.get_text(strip=True) for th in rows[0].find_all('th'))
+        body = [tuple(_soup_cell(c) for c in tr.find_all(['td', 'th'])) for tr in rows[1:]]
+        tables.append(Table(headers, body))
+    return tables
+
+def parse_wikitables(document, use_lxml=None):
+    # document is the page HTML (str or bytes); returns a list of Tables
+    if use_lxml is None:
+        use_lxml = etree is not None
+    if use_lxml and document.strip():
+        return _lxml_tables(document)
+    return _soup_tables(document)
+
+def iter_links(document):
+    # (link text, href) for every <a href> on the page
+    if etree is not None and document.strip():
+        root = etree.HTML(document)
+        for a in (root.iter('a') if root is not None else ()):
+            href = a.get('href')
+            if href is not None:
+                yield ''.join(a.itertext()), href
+        return
+    from bs4 import BeautifulSoup, SoupStrainer
+    for a in BeautifulSoup(document, 'html.parser', parse_only=SoupStrainer('a', href=True)).find_all('a'):
+        yield a.text, a['href']
+
+def row_dict(headers, row):
+    # Header -> cell text, the shape the scrapers build from each row
+    return {h: (row[i].text if i < len(row) else '') for i, h in enumerate(headers)}
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import shutil
+import time
+from pathlib import Path
+
+# Snapshots of ROM files into ROMForge/Backups. Files are cloned with a
+# copy-on-write reflink where the filesystem supports it, hardlinked when
+# source and backup share a filesystem, and copied only as a last resort.
+# Hardlinked snapshots protect against moves, renames and deletes (what
+# the organizer does) but share data with the original file.
+
+BACKUPS_DIR = Path(__file__).parent.resolve() / 'ROMForge' / 'Backups'
+MANIFEST_NAME = 'manifest.json'
+FICLONE = 0x40049409  # Linux ioctl, see ioctl_ficlone(2)
+
+def _reflink(src, dst):
+    if not sys.platform.startswith('linux'):
+        raise OSError("reflinks are only supported on Linux")
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+def clone_file(src, dst):
+    # Returns the method used: 'reflink', 'hardlink' or 'copy'
+    try:
+        _reflink(src, dst)
+        return 'reflink'
+    except OSError:
+        pass
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+    return 'copy'
+
+def snapshot(paths, root, backups_dir=BACKUPS_DIR, label=None):
+    # Clone every file in paths (all under root) into a new snapshot dir
+    name = time.strftime('%Y%m%d-%H%M%S')
+    if label:
+        name += '-' + ''.join(c for c in label if c.isalnum() or c in '-_')
+    snapshot_dir = Path(backups_dir) / name
+    suffix = 1
+    while snapshot_dir.exists():
+        suffix += 1
+        snapshot_dir = Path(backups_dir) / f"{name}-{suffix}"
+    files_dir = snapshot_dir / 'files'
+    root = os.path.abspath(root)
+    entries = []
+    methods = {}
+    made_dirs = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        rel = os.path.relpath(path, root)
+        dst = files_dir / rel
+        if dst.parent not in made_dirs:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            made_dirs.add(dst.parent)
+        try:
+            st = os.stat(path)
+            method = clone_file(path, dst)
+        except OSError as e:
+            print(f"Could not back up {path}: {e}")
+            continue
+        methods[method] = methods.get(method, 0) + 1
+        entries.append({'path': rel, 'size': st.st_size, 'mtime': st.st_mtime_ns, 'method': method})
+    manifest = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'root': root,
+        'files': entries
+    }
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    with open(snapshot_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    summary = ', '.join(f"{count} {method}" for method, count in sorted(methods.items()))
+    print(f"Snapshot {snapshot_dir.name}: {len(entries)} files ({summary or 'empty'})")
+    return snapshot_dir
+
+def list_snapshots(backups_dir=BACKUPS_DIR):
+    backups_dir = Path(backups_dir)
+    if not backups_dir.exists():
+        return []
+    return sorted(p for p in backups_dir.iterdir() if (p / MANIFEST_NAME).exists())
+
+def load_manifest(snapshot_dir):
+    with open(Path(snapshot_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def restore(snapshot_dir, root=None):
+    # Put every file back at its original path; files that are already
+    # there with the recorded size and mtime are left alone
+    manifest = load_manifest(snapshot_dir)
+    root = root or manifest['root']
+    files_dir = Path(snapshot_dir) / 'files'
+    restored = skipped = 0
+    for entry in manifest['files']:
+        dst = os.path.join(root, entry['path'])
+        if os.path.exists(dst):
+            st = os.stat(dst)
+            if st.st_size == entry['size'] and st.st_mtime_ns == entry['mtime']:
+                skipped += 1
+                continue
+            os.remove(dst)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        clone_file(files_dir / entry['path'], dst)
+        restored += 1
+    print(f"Restored {restored} files to {root} ({skipped} already in place)")
+    return restored
+
+def main():
+    snapshots = list_snapshots()
+    if not snapshots:
+        print(f"No snapshots in {BACKUPS_DIR}")
+        return
+    print("Snapshots:")
+    for i, snapshot_dir in enumerate(snapshots, 1):
+        manifest = load_manifest(snapshot_dir)
+        print(f"{i}. {snapshot_dir.name} ({len(manifest['files'])} files from {manifest['root']})")
+    choice = input("Restore which snapshot (0 to cancel): ").strip()
+    if choice.isdigit() and 0 < int(choice) <= len(snapshots):
+        restore(snapshots[int(choice) - 1])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from main import parse_dat_file
+
+# Compares the streaming DAT parser against the previous xmltodict
+# implementation on a synthetic No-Intro style DAT.
+
+def legacy_parse_dat_file(dat_path):
+    import xmltodict
+    with open(dat_path, "rb") as f:
+        dat = xmltodict.parse(f.read())
+    rom_info = {}
+    for game in dat['datafile']['game']:
+        rom = game['rom']
+        genre = game.get('category', 'Unknown')
+        title = game['@name'] if '@name' in game else rom['@name']
+        region = game.get('region', 'Unknown')
+        roms = rom if isinstance(rom, list) else [rom]
+        for r in roms:
+            rom_info[r['@crc'].lower()] = {
+                'name': r['@name'],
+                'title': title,
+                'genre': genre,
+                'region': region,
+                'ext': os.path.splitext(r['@name'])[1]
+            }
+    return rom_info
+
+def write_synthetic_dat(path, games, multi_every=10):
+    genres = ['Action', 'Platform', 'RPG', 'Sports', 'Puzzle']
+    regions = ['USA', 'Europe', 'Japan']
+    crc = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0"?>\n<datafile>\n')
+        f.write('\t<header><name>Synthetic</name><version>1</version></header>\n')
+        for i in range(games):
+            name = f"Game {i:06d} ({regions[i % 3]})"
+            f.write(f'\t<game name="{name}">\n')
+            f.write(f'\t\t<description>{name}</description>\n')
+            f.write(f'\t\t<category>{genres[i % 5]}</category>\n')
+            f.write(f'\t\t<region>{regions[i % 3]}</region>\n')
+            for part in range(2 if i % multi_every == 0 else 1):
+                crc += 1
+                f.write(f'\t\t<rom name="{name} {part}.sfc" size="{524288 + part}" crc="{crc:08X}" '
+                        f'md5="{"0" * 32}" sha1="{"0" * 40}"/>\n')
+            f.write('\t</game>\n')
+        f.write('</datafile>\n')
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DAT parsing')
+    parser.add_argument('--games', type=int, default=50000)
+    parser.add_argument('--dat', help='Use an existing DAT instead of a synthetic one')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        dat_path = args.dat
+        if not dat_path:
+            dat_path = os.path.join(tmp, 'synthetic.dat')
+            write_synthetic_dat(dat_path, args.games)
+        size_mb = os.path.getsize(dat_path) / (1024 * 1024)
+        print(f"DAT: {dat_path} ({size_mb:.1f} MB)")
+        new, new_time, new_peak = measure(parse_dat_file, dat_path)
+        print(f"  iterparse: {new_time:.2f}s, peak {new_peak / (1024 * 1024):.1f} MB, {len(new)} ROMs")
+        try:
+            old, old_time, old_peak = measure(legacy_parse_dat_file, dat_path)
+        except ImportError:
+            print("  xmltodict: not installed, skipping comparison")
+            return
+        print(f"  xmltodict: {old_time:.2f}s, peak {old_peak / (1024 * 1024):.1f} MB, {len(old)} ROMs")
+        # The legacy parser did not keep ROM sizes
+        stripped = {crc: {k: v for k, v in info.items() if k != 'size'} for crc, info in new.items()}
+        print(f"  Results identical: {old == stripped}")
+
+if __name__ == '__main__':
+    main()
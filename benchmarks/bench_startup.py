@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Startup latency as a user sees it, measured from process spawn: time to
+# the main.py menu prompt and, when a display is available, time to the
+# GUI's first drawn frame and to its library being loaded. Import costs
+# (python -X importtime) are listed so regressions can be traced to a
+# module.
+
+MENU_PROMPT = b'Select an option:'
+GUI_SCRIPT = '''
+import sys
+sys.path.insert(0, 'ROMForge')
+import main_gui
+app = main_gui.ROMManagerApp()
+set_games = app.set_games
+def loaded(games, *args):
+    set_games(games, *args)
+    print('LOADED', flush=True)
+    app.after(10, app.on_exit)
+app.set_games = loaded
+app.update()
+print('FRAME', flush=True)
+app.after(30000, app.on_exit)
+app.mainloop()
+'''
+
+def read_until(proc, markers, start, timeout=60):
+    # {marker: seconds since start} as each marker appears on stdout
+    seen = {}
+    output = b''
+    fd = proc.stdout.fileno()
+    while len(seen) < len(markers) and time.perf_counter() - start < timeout:
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            break
+        output += chunk
+        for marker in markers:
+            if marker not in seen and marker in output:
+                seen[marker] = time.perf_counter() - start
+    return seen, output
+
+def time_menu():
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-u', 'main.py'], cwd=REPO_ROOT, stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    seen, output = read_until(proc, [MENU_PROMPT], start)
+    proc.communicate(b'0\n', timeout=30)
+    if MENU_PROMPT not in seen:
+        raise RuntimeError(f"menu never appeared:\n{output.decode(errors='replace')[-2000:]}")
+    return seen[MENU_PROMPT]
+
+def time_gui():
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-u', '-c', GUI_SCRIPT], cwd=REPO_ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    seen, output = read_until(proc, [b'FRAME', b'LOADED'], start)
+    proc.kill()
+    proc.wait()
+    if b'FRAME' not in seen:
+        raise RuntimeError(f"GUI never drew a frame:\n{output.decode(errors='replace')[-2000:]}")
+    return {k.decode().lower(): v for k, v in seen.items()}
+
+def import_times(module, path=None, top=8):
+    # (total seconds, [(seconds, module)] slowest top-level imports)
+    code = f"import sys; sys.path.insert(0, {path!r}); import {module}" if path else f"import {module}"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=REPO_ROOT,
+                          capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|', 2)
+        rows.append((int(cumulative_us) / 1e6, name.rstrip()))
+    total = next((t for t, name in rows if name.strip() == module), None)
+    direct = sorted(((t, name.strip()) for t, name in rows if name.startswith('   ') and not name.startswith('    ')),
+                    reverse=True)
+    return total, direct[:top]
+
+def summarize(samples):
+    return {'min': round(min(samples), 4), 'median': round(statistics.median(samples), 4),
+            'max': round(max(samples), 4)}
+
+def has_display():
+    if sys.platform.startswith('win') or sys.platform == 'darwin':
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark time-to-menu and GUI time-to-first-frame')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target-ms', type=float, default=200.0)
+    parser.add_argument('--out', help='write the results as JSON')
+    args = parser.parse_args()
+    results = {'python': sys.version.split()[0], 'target_ms': args.target_ms}
+    menu = summarize([time_menu() for _ in range(args.repeat)])
+    results['menu'] = menu
+    verdict = 'ok' if menu['median'] * 1000 <= args.target_ms else 'over target'
+    print(f"Time to menu: median {menu['median'] * 1000:.0f} ms (min {menu['min'] * 1000:.0f}, "
+          f"max {menu['max'] * 1000:.0f}) - {verdict}")
+    total, slowest = import_times('main')
+    results['import_main'] = total
+    print(f"import main: {total * 1000:.0f} ms")
+    for seconds, name in slowest:
+        print(f"  {seconds * 1000:7.1f} ms  {name}")
+    if has_display():
+        runs = [time_gui() for _ in range(args.repeat)]
+        frame = summarize([r['frame'] for r in runs])
+        results['gui_first_frame'] = frame
+        print(f"GUI first frame: median {frame['median'] * 1000:.0f} ms (min {frame['min'] * 1000:.0f})")
+        if all('loaded' in r for r in runs):
+            loaded = summarize([r['loaded'] for r in runs])
+            results['gui_library_loaded'] = loaded
+            print(f"GUI library loaded: median {loaded['median'] * 1000:.0f} ms")
+    else:
+        print("GUI: no display available, skipped")
+    total, slowest = import_times('main_gui', 'ROMForge')
+    results['import_main_gui'] = total
+    print(f"import main_gui: {total * 1000:.0f} ms")
+    for seconds, name in slowest:
+        print(f"  {seconds * 1000:7.1f} ms  {name}")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
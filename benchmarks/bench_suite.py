@@ -0,0 +1,347 @@
+import io
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.append(str(REPO_ROOT / 'ROMForge'))
+import main
+from hash_cache import HashCache
+from catalog import Catalog
+from organizer import plan_moves, execute_plan
+from reports import write_reports
+from tag_index import MetadataIndex
+
+# End-to-end benchmark over a generated library: a DAT, thousands of ROM
+# files (sparse or random) in nested genre folders, and a console metadata
+# tree. Every stage is timed and the results are written as JSON so runs
+# can be compared with --compare. The same --seed gives the same library.
+
+RESULTS_DIR = REPO_ROOT / 'benchmarks' / 'results'
+GENRES = ['Action', 'Platform', 'RPG', 'Sports', 'Puzzle', 'Shooter', 'Racing']
+REGIONS = ['USA', 'Europe', 'Japan']
+MANUFACTURERS = ['Nintendo', 'Sega', 'Sony', 'NEC', 'SNK', 'Atari', 'Commodore']
+TAG_QUERIES = [
+    'manufacturer:nintendo',
+    'manufacturer:sega AND generation:4..6',
+    'tags:handheld OR tags:arcade',
+    'type:console NOT media_type:cd',
+    '(manufacturer:sony OR manufacturer:nec) AND generation:..5',
+]
+
+# Stages that must run before a stage so its inputs exist
+STAGE_NEEDS = {
+    'dat_parse': ['generate'],
+    'dat_index_build': ['generate'],
+    'dat_index_load': ['dat_index_build'],
+    'crc32_loop': ['generate'],
+    'scan_cold': ['dat_index_load'],
+    'scan_warm': ['scan_cold'],
+    'catalog_record': ['scan_cold'],
+    'missing_report': ['catalog_record'],
+    'sort_plan': ['scan_cold'],
+    'sort_execute': ['sort_plan', 'catalog_record'],
+    'tag_index_build': ['generate'],
+    'tag_index_load': ['tag_index_build'],
+    'tag_queries': ['tag_index_load'],
+}
+
+# --- Synthetic data ---
+
+def rom_bytes(rng, size, mode):
+    # Sparse files are a unique 64-byte signature followed by a hole
+    if mode == 'random':
+        return rng.randbytes(size)
+    return rng.randbytes(64) + bytes(size - 64)
+
+def write_rom(path, data, mode):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        if mode == 'sparse':
+            f.write(data[:64])
+            f.truncate(len(data))
+        else:
+            f.write(data)
+
+def build_library(root, dat_path, files, size_kb, mode, seed, missing_ratio=0.2):
+    # Returns {'files': n, 'bytes': n, 'dat_entries': n}
+    rng = random.Random(seed)
+    entries = []
+    total_bytes = 0
+    dat_games = int(files * (1 + missing_ratio))
+    for i in range(dat_games):
+        size = size_kb * 1024 * (1 + i % 4)
+        data = rom_bytes(rng, size, mode)
+        genre = GENRES[i % len(GENRES)]
+        region = REGIONS[i % len(REGIONS)]
+        title = f"Game {i:06d}"
+        entries.append((title, genre, region, size, format(zlib.crc32(data), '08x')))
+        if i >= files:
+            continue  # in the DAT but not owned, for the missing report
+        folder = os.path.join(root, genre, f"Batch {i % 17}")
+        kind = i % 20
+        if kind == 0:
+            data = data[:-1] + b'\x01'  # bad dump
+        if kind == 1:
+            data = bytes(512) + data  # copier header
+        if kind == 2:
+            path = os.path.join(folder, f"{title}.zip")
+            os.makedirs(folder, exist_ok=True)
+            with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as z:
+                z.writestr(f"{title}.sfc", data)
+        else:
+            write_rom(os.path.join(folder, f"{title} ({region}).sfc"), data, mode)
+        total_bytes += len(data)
+    with open(dat_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0"?>\n<datafile>\n\t<header><name>Synthetic</name></header>\n')
+        for title, genre, region, size, crc in entries:
+            f.write(f'\t<game name="{title}">\n\t\t<category>{genre}</category>\n\t\t<region>{region}</region>\n')
+            f.write(f'\t\t<rom name="{title}.sfc" size="{size}" crc="{crc.upper()}"/>\n\t</game>\n')
+        f.write('</datafile>\n')
+    return {'files': files, 'bytes': total_bytes, 'dat_entries': dat_games}
+
+def build_metadata_tree(root, consoles, seed):
+    rng = random.Random(seed)
+    categories = {'Home Console': 'Home Consoles', 'Handheld': 'Handhelds', 'Arcade': 'Arcade'}
+    for i in range(consoles):
+        kind = rng.choice(list(categories))
+        manufacturer = rng.choice(MANUFACTURERS)
+        generation = rng.randint(1, 9)
+        media = rng.choice(['cartridge', 'cd', 'disk', 'card'])
+        folder = os.path.join(root, categories[kind], manufacturer, f"Console {i:05d}")
+        os.makedirs(os.path.join(folder, 'roms'), exist_ok=True)
+        meta = {
+            'manufacturer': manufacturer,
+            'type': kind,
+            'generation': generation,
+            'media_type': media,
+            'tags': [manufacturer.lower(), kind.replace(' ', '_').lower(), f"gen-{generation}", media]
+        }
+        with open(os.path.join(folder, 'console_metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+# --- Stages ---
+
+class Suite:
+    def __init__(self, work_dir, args):
+        self.work = work_dir
+        self.args = args
+        self.rom_dir = os.path.join(work_dir, 'roms')
+        self.dat_path = os.path.join(work_dir, 'synthetic.dat')
+        self.consoles_dir = os.path.join(work_dir, 'Consoles')
+        self.results = {}
+        self.state = {}
+
+    def stage(self, name, func):
+        # func returns a dict of counts (files, bytes, ...) for throughput
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            counts = func() or {}
+            elapsed = time.perf_counter() - start
+        result = {'seconds': round(elapsed, 6)}
+        result.update(counts)
+        for key in ('files', 'bytes', 'queries', 'entries'):
+            if key in counts and elapsed > 0:
+                result[f"{key}_per_sec"] = round(counts[key] / elapsed, 2)
+        self.results[name] = result
+        extra = ', '.join(f"{k}={v}" for k, v in counts.items())
+        print(f"  {name:<18} {elapsed:9.3f}s  {extra}")
+
+    def generate(self):
+        info = build_library(self.rom_dir, self.dat_path, self.args.files, self.args.size_kb,
+                             self.args.mode, self.args.seed)
+        build_metadata_tree(self.consoles_dir, self.args.consoles, self.args.seed)
+        self.state['library'] = info
+        return info
+
+    def dat_parse(self):
+        rom_info = main.parse_dat_file(self.dat_path)
+        return {'entries': len(rom_info)}
+
+    def dat_index_build(self):
+        index_path = os.path.join(self.work, 'dat_index.bin')
+        self.state['rom_info'] = main.load_rom_info(self.dat_path, index_path)
+        return {'entries': len(self.state['rom_info'])}
+
+    def dat_index_load(self):
+        rom_info = main.load_rom_info(self.dat_path, os.path.join(self.work, 'dat_index.bin'))
+        self.state['size_index'] = main.build_size_index(rom_info)
+        return {'entries': len(rom_info)}
+
+    def crc32_loop(self):
+        total = 0
+        files = 0
+        for _, path in main.iter_rom_files(self.rom_dir):
+            if path.endswith(main.ROM_EXTS):
+                main.compute_crc32_views(path)
+                total += os.path.getsize(path)
+                files += 1
+        return {'files': files, 'bytes': total}
+
+    def _scan(self):
+        records = []
+        cache = self.state['cache']
+        good, bad = main.scan_roms(self.rom_dir, self.state['rom_info'], cache,
+                                   size_index=self.state['size_index'], records=records)
+        cache.save()
+        self.state.update(good=good, records=records)
+        return {'files': len(good) + len(bad), 'good': len(good), 'bad': len(bad),
+                'bytes': sum(r['size'] for r in records), 'cache_hits': cache.hits}
+
+    def scan_cold(self):
+        self.state['cache'] = HashCache(os.path.join(self.work, 'hash_cache.json'))
+        return self._scan()
+
+    def scan_warm(self):
+        self.state['cache'] = HashCache(os.path.join(self.work, 'hash_cache.json'))
+        return self._scan()
+
+    def catalog_record(self):
+        catalog = self.state['catalog'] = Catalog(os.path.join(self.work, 'library.db'))
+        catalog.sync_dat(main.SYSTEM, self.state['rom_info'], 'synthetic')
+        catalog.record_scan(main.SYSTEM, self.rom_dir, self.state['records'])
+        return {'files': len(self.state['records'])}
+
+    def missing_report(self):
+        counts = write_reports(self.state['catalog'], main.SYSTEM, os.path.join(self.work, 'Reports'))
+        return {'missing': counts['missing'], 'good': counts['good']}
+
+    def sort_plan(self):
+        moves, skipped = plan_moves(self.state['good'], self.rom_dir)
+        self.state['moves'] = moves
+        return {'files': len(moves), 'skipped': len(skipped)}
+
+    def sort_execute(self):
+        moved, failed = execute_plan(self.state['moves'], cache=self.state['cache'])
+        self.state['catalog'].move_files((m.src, m.dst) for m in moved)
+        return {'files': len(moved), 'failed': len(failed)}
+
+    def tag_index_build(self):
+        index = MetadataIndex(self.consoles_dir, os.path.join(self.work, 'metadata_index.json'))
+        return {'entries': len(index)}
+
+    def tag_index_load(self):
+        index = MetadataIndex(self.consoles_dir, os.path.join(self.work, 'metadata_index.json'))
+        self.state['tag_index'] = index
+        return {'entries': len(index)}
+
+    def tag_queries(self):
+        index = self.state['tag_index']
+        matches = 0
+        for _ in range(self.args.query_repeat):
+            for query in TAG_QUERIES:
+                matches += len(index.search(query))
+        return {'queries': self.args.query_repeat * len(TAG_QUERIES), 'matches': matches}
+
+    def run(self):
+        stages = [
+            ('generate', self.generate),
+            ('dat_parse', self.dat_parse),
+            ('dat_index_build', self.dat_index_build),
+            ('dat_index_load', self.dat_index_load),
+            ('crc32_loop', self.crc32_loop),
+            ('scan_cold', self.scan_cold),
+            ('scan_warm', self.scan_warm),
+            ('catalog_record', self.catalog_record),
+            ('missing_report', self.missing_report),
+            ('sort_plan', self.sort_plan),
+            ('sort_execute', self.sort_execute),
+            ('tag_index_build', self.tag_index_build),
+            ('tag_index_load', self.tag_index_load),
+            ('tag_queries', self.tag_queries),
+        ]
+        # Stages a selected stage needs run too, so it has its inputs
+        wanted = set(self.args.only or [name for name, _ in stages])
+        unknown = wanted - {name for name, _ in stages}
+        if unknown:
+            raise SystemExit(f"Unknown stages: {', '.join(sorted(unknown))}")
+        pending = list(wanted)
+        while pending:
+            for dep in STAGE_NEEDS.get(pending.pop(), ()):
+                if dep not in wanted:
+                    wanted.add(dep)
+                    pending.append(dep)
+        for name, func in stages:
+            if name in wanted:
+                self.stage(name, func)
+        if 'catalog' in self.state:
+            self.state['catalog'].close()
+        return self.results
+
+# --- Output ---
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(old_path, results):
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)['results']
+    print(f"\nCompared with {old_path}:")
+    for name, result in results.items():
+        if name not in old or not old[name]['seconds']:
+            continue
+        ratio = result['seconds'] / old[name]['seconds']
+        note = 'faster' if ratio < 1 else 'slower'
+        print(f"  {name:<18} {old[name]['seconds']:9.3f}s -> {result['seconds']:9.3f}s  "
+              f"({abs(1 - ratio) * 100:.0f}% {note})")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description='Benchmark the ROM pipeline on a synthetic library')
+    parser.add_argument('--files', type=int, default=2000, help='ROM files in the library')
+    parser.add_argument('--size-kb', type=int, default=256, help='base ROM size (files are 1-4x this)')
+    parser.add_argument('--mode', choices=('sparse', 'random'), default='sparse',
+                        help='sparse files exercise the pipeline; random files exercise the disk')
+    parser.add_argument('--consoles', type=int, default=2000, help='console metadata folders')
+    parser.add_argument('--query-repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--only', nargs='*', help='stages to run (plus the stages they depend on)')
+    parser.add_argument('--work-dir', help='where to build the library (default: a temp dir, removed after)')
+    parser.add_argument('--out', help='results JSON (default: benchmarks/results/bench-<time>.json)')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    args = parser.parse_args()
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='rom-bench-')
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"Benchmark library in {work_dir}")
+    try:
+        results = Suite(work_dir, args).run()
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'hash_workers': main.HASH_WORKERS,
+            'params': {k: v for k, v in vars(args).items() if k not in ('out', 'compare', 'work_dir')}
+        },
+        'results': results
+    }
+    out = args.out or RESULTS_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+    if args.compare:
+        compare(args.compare, results)
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'ROMForge'))
+from wikitable import Cell, Table, parse_wikitables, etree
+
+# Parse throughput of the wikitable extractor on saved pages (e.g. the
+# scraper's HTTP cache bodies) or on a synthetic multi-megabyte list page,
+# compared with the previous full-page BeautifulSoup html.parser approach.
+
+def legacy_parse_wikitables(document):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(document, 'html.parser')
+    tables = []
+    for table in soup.find_all('table', {'class': 'wikitable'}):
+        first = table.find('tr')
+        if first is None:
+            continue
+        headers = tuple(th.get_text(strip=True) for th in first.find_all('th'))
+        rows = []
+        for row in table.find_all('tr')[1:]:
+            cells = []
+            for c in row.find_all(['td', 'th']):
+                link = c.find('a')
+                cells.append(Cell(c.name, c.get_text(strip=True), link.get('href') if link is not None else None))
+            rows.append(tuple(cells))
+        tables.append(Table(headers, rows))
+    return tables
+
+def synthetic_page(games, seed=1):
+    # Roughly shaped like a "List of ... games" article: navigation,
+    # prose and references around large wikitables
+    rng = random.Random(seed)
+    words = ['Super', 'Mega', 'Quest', 'Legend', 'Star', 'Kart', 'Fighter', 'Dragon', 'Puzzle', 'Racer']
+    out = ['<!DOCTYPE html><html><head><title>List of games</title>',
+           '<style>.wikitable td { padding: 2px }</style><script>var wg = {"a": "<td>x</td>"};</script></head><body>']
+    out.append('<div id="nav">' + ''.join(f'<a href="/wiki/Nav_{i}">Nav {i}</a> ' for i in range(300)) + '</div>')
+    for p in range(200):
+        out.append(f'<p>Paragraph {p} with <b>bold</b>, <i>italics</i> and a <a href="/wiki/Ref_{p}">link</a>.'
+                   f'<sup class="reference"><a href="#cite-{p}">[{p}]</a></sup></p>')
+    per_table = max(1, games // 4)
+    n = 0
+    for t in range(4):
+        out.append('<table class="wikitable sortable"><tbody><tr><th>Title</th><th>Developer</th>'
+                   '<th>Publisher</th><th>Release date</th><th>Genre</th><th>Region</th></tr>')
+        for _ in range(per_table):
+            title = ' '.join(rng.sample(words, 3))
+            out.append(f'<tr><td><i><a href="/wiki/Game_{n}" title="{title}">{title} {n}</a></i>'
+                       f'<sup class="reference"><a href="#cite-g{n}">[{n}]</a></sup></td>'
+                       f'<td><a href="/wiki/Dev_{n % 50}">Dev {n % 50}</a></td>'
+                       f'<td>Pub {n % 30}<!-- publisher note --></td>'
+                       f'<td><span style="display:none">{1990 + n % 10}-01-01</span>'
+                       f'{["Jan", "Feb", "Mar"][n % 3]} {1 + n % 28}, {1990 + n % 10}</td>'
+                       f'<td>{["Action", "RPG", "Sports"][n % 3]}</td><td>NA<br/>PAL</td></tr>\n')
+            n += 1
+        out.append('</tbody></table>')
+        out.append('<table class="infobox"><tr><th>Not</th><th>A wikitable</th></tr>'
+                   '<tr><td>x</td><td>y</td></tr></table>')
+    out.append('<div id="footer">' + 'Footer text. ' * 2000 + '</div></body></html>')
+    return ''.join(out)
+
+def time_parse(func, documents, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [func(d) for d in documents]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+def load_pages(paths):
+    documents = []
+    for path in paths:
+        files = sorted(Path(path).rglob('*')) if os.path.isdir(path) else [Path(path)]
+        for f in files:
+            if f.is_file() and f.suffix in ('.html', '.htm', '.body'):
+                documents.append(f.read_text(encoding='utf-8', errors='replace'))
+    return documents
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark wikitable parsing')
+    parser.add_argument('--pages', nargs='*', help='Saved HTML pages or directories (e.g. ROMForge/.http_cache)')
+    parser.add_argument('--games', type=int, default=8000, help='rows in the synthetic page')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    documents = load_pages(args.pages) if args.pages else [synthetic_page(args.games)]
+    if not documents:
+        print("No pages found.")
+        return
+    size_mb = sum(len(d.encode('utf-8')) for d in documents) / (1024 * 1024)
+    print(f"Pages: {len(documents)} ({size_mb:.1f} MB)")
+    legacy, legacy_time = time_parse(legacy_parse_wikitables, documents, args.repeat)
+    rows = sum(len(t.rows) for tables in legacy for t in tables)
+    print(f"  bs4 html.parser (full page): {legacy_time:.2f}s, {size_mb / legacy_time:.1f} MB/s, {rows} rows")
+    strained, strained_time = time_parse(lambda d: parse_wikitables(d, use_lxml=False), documents, args.repeat)
+    print(f"  bs4 SoupStrainer (tables):   {strained_time:.2f}s, {size_mb / strained_time:.1f} MB/s, "
+          f"identical: {strained == legacy}")
+    if etree is None:
+        print("  lxml: not installed, skipping")
+        return
+    fast, fast_time = time_parse(lambda d: parse_wikitables(d, use_lxml=True), documents, args.repeat)
+    print(f"  lxml (C parser):             {fast_time:.2f}s, {size_mb / fast_time:.1f} MB/s, "
+          f"identical: {fast == legacy}")
+
+if __name__ == '__main__':
+    main()
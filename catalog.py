@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import sqlite3
+from pathlib import Path
+
+# Persistent library catalog shared by the CLI and the GUI. Scan results,
+# DAT entries and covers live in one SQLite database so reports are
+# indexed queries instead of rescans. Metadata tags are indexed separately
+# (ROMForge/tag_index.py).
+
+CATALOG_PATH = Path(__file__).parent.resolve() / 'ROMForge' / 'library.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dat_sources (
+    system TEXT PRIMARY KEY,
+    source TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dat_entries (
+    system TEXT NOT NULL,
+    crc TEXT NOT NULL,
+    name TEXT,
+    title TEXT,
+    genre TEXT,
+    region TEXT,
+    ext TEXT,
+    size INTEGER,
+    PRIMARY KEY (system, crc)
+);
+CREATE INDEX IF NOT EXISTS dat_entries_title ON dat_entries (system, title);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    system TEXT NOT NULL,
+    size INTEGER,
+    mtime INTEGER,
+    crc32 TEXT,
+    crc32_headerless TEXT,
+    match_crc TEXT,
+    match_view TEXT,
+    status TEXT NOT NULL,
+    scanned_at REAL
+);
+DROP INDEX IF EXISTS files_match;
+CREATE INDEX IF NOT EXISTS files_match_status ON files (system, match_crc, status);
+CREATE INDEX IF NOT EXISTS files_status ON files (system, status);
+CREATE TABLE IF NOT EXISTS covers (
+    title TEXT PRIMARY KEY,
+    path TEXT,
+    fetched_at REAL
+);
+"""
+
+FILE_COLUMNS = ('path', 'system', 'size', 'mtime', 'crc32', 'crc32_headerless',
+                'match_crc', 'match_view', 'status', 'scanned_at')
+
+def _prefix_range(root):
+    # [low, high) bounds covering every path below root, usable by the index
+    root = os.path.join(os.path.abspath(root), '')
+    return root, root[:-1] + chr(ord(root[-1]) + 1)
+
+class Catalog:
+    def __init__(self, db_path=CATALOG_PATH):
+        self.db_path = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- DAT entries ---
+
+    def sync_dat(self, system, rom_info, source):
+        # Reload the DAT entries for system only when its source changed
+        source = json.dumps(source, sort_keys=True)
+        row = self.conn.execute('SELECT source FROM dat_sources WHERE system = ?', (system,)).fetchone()
+        if row and row['source'] == source:
+            return False
+        with self.conn:
+            self.conn.execute('DELETE FROM dat_entries WHERE system = ?', (system,))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO dat_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                ((system, crc, info['name'], info['title'], info['genre'], info['region'],
+                  info['ext'], info.get('size')) for crc, info in rom_info.items()))
+            self.conn.execute('INSERT OR REPLACE INTO dat_sources VALUES (?, ?)', (system, source))
+        return True
+
+    # --- Files ---
+
+    def _insert_files(self, system, records):
+        now = time.time()
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO files VALUES ({', '.join('?' * len(FILE_COLUMNS))})",
+            ((os.path.abspath(r['path']), system, r['size'], r['mtime'], r['crc32'],
+              r['crc32_headerless'], r['match_crc'], r['match_view'], r['status'], now)
+             for r in records))
+
+    def record_scan(self, system, root, records):
+        # Replace everything known under root with the results of a scan
+        with self.conn:
+            self.conn.execute('DELETE FROM files WHERE path >= ? AND path < ?', _prefix_range(root))
+            self._insert_files(system, records)
+
+    def update_files(self, system, records):
+        with self.conn:
+            self._insert_files(system, records)
+
+    def remove_files(self, paths):
+        with self.conn:
+            self.conn.executemany('DELETE FROM files WHERE path = ?',
+                                  ((os.path.abspath(p),) for p in paths))
+
+    def move_files(self, moves):
+        # moves is an iterable of (old path, new path) pairs
+        with self.conn:
+            self.conn.executemany('UPDATE OR REPLACE files SET path = ? WHERE path = ?',
+                                  ((os.path.abspath(new), os.path.abspath(old)) for old, new in moves))
+
+    def file_stats(self, root):
+        # {path: (size, mtime)} for every file recorded under root
+        return {row['path']: (row['size'], row['mtime']) for row in self.conn.execute(
+            'SELECT path, size, mtime FROM files WHERE path >= ? AND path < ?', _prefix_range(root))}
+
+    def good_files(self, system, root=None):
+        # Rebuild the scan's good list: (file, path, info) tuples
+        sql = """SELECT f.path, f.match_crc, f.match_view, d.*
+                 FROM files f JOIN dat_entries d ON d.system = f.system AND d.crc = f.match_crc
+                 WHERE f.system = ? AND f.status = 'good'"""
+        params = [system]
+        if root:
+            sql += ' AND f.path >= ? AND f.path < ?'
+            params += _prefix_range(root)
+        good = []
+        for row in self.conn.execute(sql + ' ORDER BY f.path', params):
+            info = {k: row[k] for k in ('name', 'title', 'genre', 'region', 'ext', 'size')}
+            info['crc'] = row['match_crc']
+            info['view'] = row['match_view']
+            good.append((os.path.basename(row['path']), row['path'], info))
+        return good
+
+    # --- Reports ---
+
+    def missing(self, system):
+        # The owned titles are computed once and subtracted; NULL titles
+        # are left out of both sides
+        return [row['title'] for row in self.conn.execute(
+            """SELECT title FROM dat_entries WHERE system = ? AND title IS NOT NULL
+               EXCEPT
+               SELECT d.title FROM files f
+               JOIN dat_entries d ON d.system = f.system AND d.crc = f.match_crc
+               WHERE f.system = ? AND f.status = 'good' AND d.title IS NOT NULL
+               ORDER BY title""", (system, system))]
+
+    def coverage(self, system, field):
+        # Per genre or region: (value, titles owned, titles in DAT)
+        if field not in ('genre', 'region'):
+            raise ValueError(f"Unsupported report field: {field}")
+        return [(row['value'], row['owned'], row['total']) for row in self.conn.execute(
+            f"""SELECT COALESCE(d.{field}, 'Unknown') AS value,
+                       COUNT(DISTINCT CASE WHEN f.path IS NOT NULL THEN d.title END) AS owned,
+                       COUNT(DISTINCT d.title) AS total
+                FROM dat_entries d
+                LEFT JOIN files f ON f.system = d.system AND f.match_crc = d.crc AND f.status = 'good'
+                WHERE d.system = ?
+                GROUP BY value ORDER BY value""", (system,))]
+
+    # --- Covers ---
+
+    def record_covers(self, covers):
+        # covers maps title -> cover path (or None when nothing was found)
+        now = time.time()
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO covers VALUES (?, ?, ?)',
+                                  ((title, path, now) for title, path in covers.items()))
+
+    def games(self):
+        # One dict per catalogued file, in the shape the GUI grid expects
+        rows = self.conn.execute(
+            """SELECT f.path, f.system, f.status, f.size, d.title, d.genre, d.region, c.path AS cover
+               FROM files f
+               LEFT JOIN dat_entries d ON d.system = f.system AND d.crc = f.match_crc
+               LEFT JOIN covers c ON c.title = d.title
+               ORDER BY COALESCE(d.title, f.path)""")
+        return [{
+            'title': row['title'] or os.path.splitext(os.path.basename(row['path']))[0],
+            'system': row['system'],
+            'genre': row['genre'],
+            'region': row['region'],
+            'status': row['status'],
+            'path': row['path'],
+            'size': row['size'],
+            'cover': row['cover']
+        } for row in rows]
@@ -0,0 +1,129 @@
+import os
+import re
+import json
+import time
+import threading
+from urllib.parse import quote, urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from http_session import ThrottledSession
+
+# Concurrent cover downloader: one throttled session shared by all workers
+# (see http_session.py) and a persistent cache of titles that found no
+# cover so they are not searched again until the entry expires.
+
+SEARCH_URL = "https://www.bing.com/images/search?q={query}&form=HDRSC2"
+IMAGE_URL_RE = re.compile(r'imgurl:&quot;(https?://[^&]+)')
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+NEGATIVE_CACHE_NAME = '.missing_covers.json'
+
+class CoverFetcher:
+    def __init__(self, covers_dir, workers=8, host_interval=0.5, retries=3, backoff=1.0,
+                 timeout=10, negative_ttl=7 * 24 * 3600, search_url=SEARCH_URL):
+        self.covers_dir = covers_dir
+        self.workers = workers
+        self.negative_ttl = negative_ttl
+        self.search_url = search_url
+        self.http = ThrottledSession(workers, "Mozilla/5.0", host_interval, retries, backoff, timeout)
+        self._lock = threading.Lock()
+        self.negative_cache_path = os.path.join(covers_dir, NEGATIVE_CACHE_NAME)
+        self.negative = {}
+        if os.path.exists(self.negative_cache_path):
+            try:
+                with open(self.negative_cache_path, 'r', encoding='utf-8') as f:
+                    self.negative = json.load(f)
+            except (OSError, ValueError):
+                self.negative = {}
+
+    def close(self):
+        self.save_negative_cache()
+        self.http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def save_negative_cache(self):
+        with self._lock:
+            data = dict(self.negative)
+        tmp_path = self.negative_cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.negative_cache_path)
+
+    def is_known_missing(self, title):
+        with self._lock:
+            checked = self.negative.get(title)
+        return checked is not None and time.time() - checked < self.negative_ttl
+
+    def existing_cover(self, title):
+        for ext in IMAGE_EXTS:
+            path = os.path.join(self.covers_dir, f"{title}{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    @property
+    def retry_count(self):
+        return self.http.retry_count
+
+    def find_image_url(self, title):
+        query = quote(title + ' SNES cover')
+        # Only a 200 page without an image is a real miss; a block, consent
+        # redirect or server error must not be cached as "no cover"
+        resp = self.http.get(self.search_url.format(query=query))
+        if resp.status_code != 200:
+            raise requests.RequestException(f"image search returned HTTP {resp.status_code}")
+        match = IMAGE_URL_RE.search(resp.text)
+        return match.group(1) if match else None
+
+    def _download(self, img_url, title):
+        ext = os.path.splitext(urlparse(img_url).path)[1].lower()
+        if ext not in IMAGE_EXTS:
+            ext = '.jpg'
+        cover_path = os.path.join(self.covers_dir, f"{title}{ext}")
+        tmp_path = f"{cover_path}.{threading.get_ident()}.part"
+        with self.http.get(img_url, stream=True) as resp:
+            if resp.status_code != 200:
+                return None
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in resp.iter_content(chunk_size=65536):
+                        f.write(chunk)
+                os.replace(tmp_path, cover_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return cover_path
+
+    def fetch(self, title):
+        # Returns the cover path, or None when no cover could be found
+        cover_path = self.existing_cover(title)
+        if cover_path or self.is_known_missing(title):
+            return cover_path
+        try:
+            img_url = self.find_image_url(title)
+            if img_url is None:
+                with self._lock:
+                    self.negative[title] = time.time()
+                return None
+            cover_path = self._download(img_url, title)
+        except (requests.RequestException, OSError) as e:
+            print(f"Failed to download cover for {title}: {e}")
+            return None
+        if cover_path:
+            with self._lock:
+                self.negative.pop(title, None)
+            print(f"Downloaded cover for {title}")
+        return cover_path
+
+    def fetch_all(self, titles):
+        # Returns {title: cover path or None}
+        titles = list(dict.fromkeys(titles))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = dict(zip(titles, pool.map(self.fetch, titles)))
+        self.save_negative_cache()
+        return results
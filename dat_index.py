@@ -0,0 +1,227 @@
+import os
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+
+# Compiled, memory-mapped DAT index shared by every process that opens it.
+#
+# Layout (little endian):
+#   header     magic, version, system count, string count,
+#              string table offset, string blob offset
+#   systems    per system: name id, source id, record count,
+#              CRC array offset, record array offset
+#   per system a sorted u32 CRC array followed by fixed-size records
+#              (name, title, genre, region, ext string ids, size)
+#   strings    u32 offset table followed by the UTF-8 blob; every string
+#              is stored once no matter how many records use it
+
+MAGIC = b'RMDX'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQ')
+SYSTEM = struct.Struct('<IIIIQQ')
+RECORD = struct.Struct('<5IQ')
+CRC = struct.Struct('<I')
+NO_STRING = 0xFFFFFFFF
+NO_SIZE = 0xFFFFFFFFFFFFFFFF
+FIELDS = ('name', 'title', 'genre', 'region', 'ext')
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+def dat_fingerprint(dat_path):
+    st = os.stat(dat_path)
+    return {'path': os.path.abspath(dat_path), 'size': st.st_size, 'mtime': st.st_mtime_ns}
+
+def build_index(systems, index_path, sources=None):
+    # systems maps a system name to a rom_info dict (crc hex -> info)
+    sources = sources or {}
+    strings = []
+    string_ids = {}
+
+    def intern(value):
+        if value is None:
+            return NO_STRING
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    sections = []
+    for name in sorted(systems):
+        rom_info = systems[name]
+        crcs = sorted(int(crc, 16) for crc in rom_info)
+        records = []
+        for crc in crcs:
+            info = rom_info[format(crc, '08x')]
+            size = info.get('size')
+            records.append(RECORD.pack(*(intern(info.get(f)) for f in FIELDS),
+                                       NO_SIZE if size is None else size))
+        source = json.dumps(sources.get(name), sort_keys=True)
+        sections.append((intern(name), intern(source), crcs, records))
+
+    offset = HEADER.size + SYSTEM.size * len(sections)
+    system_table = []
+    layout = []
+    for name_id, source_id, crcs, records in sections:
+        crcs_offset = _align(offset)
+        records_offset = _align(crcs_offset + CRC.size * len(crcs))
+        offset = records_offset + RECORD.size * len(records)
+        system_table.append(SYSTEM.pack(name_id, source_id, len(crcs), 0, crcs_offset, records_offset))
+        layout.append((crcs_offset, crcs, records_offset, records))
+    encoded = [s.encode('utf-8') for s in strings]
+    strings_offset = _align(offset)
+    blob_offset = strings_offset + 4 * (len(encoded) + 1)
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(sections), len(encoded), strings_offset, blob_offset))
+        f.write(b''.join(system_table))
+        for crcs_offset, crcs, records_offset, records in layout:
+            f.seek(crcs_offset)
+            f.write(struct.pack(f'<{len(crcs)}I', *crcs))
+            f.seek(records_offset)
+            f.write(b''.join(records))
+        f.seek(strings_offset)
+        position = 0
+        for s in encoded:
+            f.write(CRC.pack(position))
+            position += len(s)
+        f.write(CRC.pack(position))
+        f.write(b''.join(encoded))
+    os.replace(tmp_path, index_path)
+
+class SystemIndex(Mapping):
+    def __init__(self, index, name, source, count, crcs_offset, records_offset):
+        self._index = index
+        self.name = name
+        self.source = source
+        self._count = count
+        self._crcs_offset = crcs_offset
+        self._records_offset = records_offset
+
+    def _crc_at(self, i):
+        return CRC.unpack_from(self._index.mm, self._crcs_offset + CRC.size * i)[0]
+
+    def _find(self, crc):
+        try:
+            value = int(crc, 16)
+        except (TypeError, ValueError):
+            return -1
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._crc_at(mid) < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._crc_at(lo) == value:
+            return lo
+        return -1
+
+    def _record(self, i):
+        values = RECORD.unpack_from(self._index.mm, self._records_offset + RECORD.size * i)
+        info = {f: self._index.string(sid) for f, sid in zip(FIELDS, values)}
+        info['size'] = None if values[-1] == NO_SIZE else values[-1]
+        return info
+
+    def __contains__(self, crc):
+        return self._find(crc) >= 0
+
+    def __getitem__(self, crc):
+        i = self._find(crc)
+        if i < 0:
+            raise KeyError(crc)
+        return self._record(i)
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield format(self._crc_at(i), '08x')
+
+    def __len__(self):
+        return self._count
+
+    def size_index(self):
+        # size -> candidate CRCs, read straight from the record array
+        mm = self._index.mm
+        crcs = struct.unpack_from(f'<{self._count}I', mm, self._crcs_offset)
+        size_index = {}
+        for i, crc in enumerate(crcs):
+            size = struct.unpack_from('<Q', mm, self._records_offset + RECORD.size * i + 20)[0]
+            if size == NO_SIZE:
+                return None
+            size_index.setdefault(size, []).append(format(crc, '08x'))
+        return size_index
+
+class DatIndex:
+    def __init__(self, index_path):
+        self.index_path = index_path
+        with open(index_path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_systems, n_strings, strings_offset, blob_offset = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"{index_path} is not a DAT index (version {VERSION})")
+        self._n_strings = n_strings
+        self._strings_offset = strings_offset
+        self._blob_offset = blob_offset
+        self._strings = {}
+        self.systems = {}
+        for i in range(n_systems):
+            name_id, source_id, count, _, crcs_offset, records_offset = SYSTEM.unpack_from(
+                self.mm, HEADER.size + SYSTEM.size * i)
+            name = self.string(name_id)
+            source = json.loads(self.string(source_id))
+            self.systems[name] = SystemIndex(self, name, source, count, crcs_offset, records_offset)
+
+    def string(self, sid):
+        if sid == NO_STRING:
+            return None
+        value = self._strings.get(sid)
+        if value is None:
+            start, end = struct.unpack_from('<II', self.mm, self._strings_offset + 4 * sid)
+            value = self.mm[self._blob_offset + start:self._blob_offset + end].decode('utf-8')
+            self._strings[sid] = value
+        return value
+
+    def system(self, name):
+        return self.systems[name]
+
+    def close(self):
+        self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_index(index_path, dats, parse):
+    # Open the index, rebuilding it when any of the given DATs (system ->
+    # DAT path) changed since it was compiled. Systems already in the
+    # index but not passed in are carried over unchanged.
+    index = None
+    if os.path.exists(index_path):
+        try:
+            index = DatIndex(index_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Rebuilding unreadable DAT index {index_path}: {e}")
+    if index is not None:
+        stale = [name for name, dat_path in dats.items()
+                 if name not in index.systems or index.systems[name].source != dat_fingerprint(dat_path)]
+        if not stale:
+            return index
+    print("Compiling DAT index...")
+    systems = {}
+    sources = {}
+    if index is not None:
+        for name, system in index.systems.items():
+            if name not in dats:
+                systems[name] = dict(system.items())
+                sources[name] = system.source
+        index.close()
+    for name, dat_path in dats.items():
+        systems[name] = parse(dat_path)
+        sources[name] = dat_fingerprint(dat_path)
+    build_index(systems, index_path, sources)
+    return DatIndex(index_path)
@@ -0,0 +1,194 @@
+import os
+import stat
+import filecmp
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Duplicate finder for ROM trees where the same dump has been copied into
+# several console and genre folders. Candidates are narrowed in tiers so
+# that most files are never read in full:
+#
+#   1. size        - only sizes shared by two or more files go on
+#   2. quick key   - the CRC32 from the hash cache when every file of that
+#                    size has one, else a SHA-1 of the first and last chunk
+#   3. full SHA-1  - taken from the hash cache when the agent stored one,
+#                    else computed, for files still colliding after 2
+#
+# Paths that are already hardlinks of each other count as one copy. When
+# duplicates are replaced with hardlinks, each file is compared byte for
+# byte with the copy being kept right before it is replaced.
+
+CHUNK_SIZE = 64 * 1024
+READ_SIZE = 1024 * 1024
+DEDUPE_SUFFIX = '.dedupe-tmp'
+
+# files holds one tuple of paths per distinct inode; files[0][0] is kept
+DuplicateGroup = namedtuple('DuplicateGroup', 'size sha1 files')
+
+def iter_files(roots, exts=None, min_size=1):
+    # (path, stat) for regular files under roots, not following symlinks
+    for root in roots:
+        for dirpath, dirnames, files in os.walk(root):
+            dirnames.sort()
+            for name in sorted(files):
+                if exts and not name.lower().endswith(exts):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode) and st.st_size >= min_size:
+                    yield path, st
+
+def sha1_file(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(READ_SIZE)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+def quick_digest(path, size, chunk_size=CHUNK_SIZE):
+    # ('full', sha1) when the whole file fits in the two chunks, since that
+    # is already the final answer; else ('part', sha1 of first + last chunk)
+    with open(path, 'rb') as f:
+        if size <= 2 * chunk_size:
+            return 'full', hashlib.sha1(f.read()).hexdigest()
+        h = hashlib.sha1(f.read(chunk_size))
+        f.seek(size - chunk_size)
+        h.update(f.read(chunk_size))
+        return 'part', h.hexdigest()
+
+def _group(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return [g for g in groups.values() if len(g) > 1]
+
+def find_duplicates(roots, cache=None, exts=None, min_size=1, chunk_size=CHUNK_SIZE, workers=8, stats=None):
+    # Returns DuplicateGroups, largest waste first. If stats is a dict it
+    # receives per-tier counters (files, size_collisions, quick_hashed,
+    # full_hashed, cache_reused, bytes_read).
+    stats = {} if stats is None else stats
+    for key in ('files', 'size_collisions', 'quick_hashed', 'full_hashed', 'cache_reused', 'bytes_read'):
+        stats.setdefault(key, 0)
+    # One entry per inode, so existing hardlinks are a single copy
+    inodes = {}
+    for path, st in iter_files(roots, exts, min_size):
+        stats['files'] += 1
+        entry = inodes.setdefault((st.st_dev, st.st_ino), {'paths': [], 'st': st, 'hashes': None, 'quick': None})
+        entry['paths'].append(path)
+    candidates = _group(inodes.values(), lambda e: e['st'].st_size)
+    stats['size_collisions'] = sum(len(g) for g in candidates)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Tier 2: cached CRCs when the whole size group has them, else a
+        # hash of the first and last chunk
+        tier2 = []
+        for group in candidates:
+            if cache is not None:
+                for e in group:
+                    e['hashes'] = cache.get(e['paths'][0], e['st'])
+            if all(e['hashes'] and e['hashes'].get('raw') for e in group):
+                stats['cache_reused'] += len(group)
+                tier2 += _group(group, lambda e: ('crc', e['hashes']['raw']))
+                continue
+            size = group[0]['st'].st_size
+            futures = [(e, pool.submit(quick_digest, e['paths'][0], size, chunk_size)) for e in group]
+            readable = []
+            for e, future in futures:
+                try:
+                    e['quick'] = future.result()
+                except OSError as err:
+                    print(f"Cannot read {e['paths'][0]}: {err}")
+                    continue
+                readable.append(e)
+            stats['quick_hashed'] += len(readable)
+            stats['bytes_read'] += len(readable) * min(size, 2 * chunk_size)
+            tier2 += _group(readable, lambda e: e['quick'])
+        # Tier 3: full SHA-1, reusing any the cache (or tier 2) already has
+        confirmed = []
+        for group in tier2:
+            pending = []
+            for e in group:
+                if e['quick'] and e['quick'][0] == 'full':
+                    confirmed.append((e['st'].st_size, e['quick'][1], tuple(sorted(e['paths']))))
+                elif e['hashes'] and e['hashes'].get('sha1'):
+                    stats['cache_reused'] += 1
+                    confirmed.append((e['st'].st_size, e['hashes']['sha1'], tuple(sorted(e['paths']))))
+                else:
+                    pending.append((e, pool.submit(sha1_file, e['paths'][0])))
+            for e, future in pending:
+                try:
+                    digest = future.result()
+                except OSError as err:
+                    print(f"Cannot read {e['paths'][0]}: {err}")
+                    continue
+                stats['full_hashed'] += 1
+                stats['bytes_read'] += e['st'].st_size
+                if cache is not None and e['hashes'] and e['hashes'].get('raw'):
+                    # Only extend entries the scan wrote; an entry without
+                    # CRCs would read as a bad dump to the next scan
+                    cache.put(e['paths'][0], dict(e['hashes'], sha1=digest), e['st'])
+                confirmed.append((e['st'].st_size, digest, tuple(sorted(e['paths']))))
+    groups = []
+    for same in _group(confirmed, lambda c: (c[0], c[1])):
+        groups.append(DuplicateGroup(same[0][0], same[0][1], sorted(c[2] for c in same)))
+    groups.sort(key=lambda g: (-wasted_bytes([g]), g.files[0][0]))
+    return groups
+
+def wasted_bytes(groups):
+    return sum(g.size * (len(g.files) - 1) for g in groups)
+
+def hardlink_duplicates(groups, cache=None):
+    # Replace every extra copy with a hardlink to files[0][0]. Returns
+    # (linked paths, bytes freed, [(path, reason)] not linked). A copy
+    # on another filesystem, or one that no longer matches byte for
+    # byte, is left alone.
+    linked = []
+    freed = 0
+    skipped = []
+    for group in groups:
+        keep = group.files[0][0]
+        try:
+            keep_st = os.stat(keep)
+        except OSError as e:
+            skipped += [(p, f"cannot read {keep}: {e}") for paths in group.files[1:] for p in paths]
+            continue
+        keep_hashes = cache.get(keep, keep_st) if cache is not None else None
+        for paths in group.files[1:]:
+            replaced = 0
+            for path in paths:
+                tmp_path = path + DEDUPE_SUFFIX
+                try:
+                    st = os.stat(path)
+                    if st.st_dev != keep_st.st_dev:
+                        skipped.append((path, "on a different filesystem"))
+                        continue
+                    if (st.st_dev, st.st_ino) == (keep_st.st_dev, keep_st.st_ino):
+                        replaced += 1
+                        continue
+                    if st.st_size != group.size or not filecmp.cmp(keep, path, shallow=False):
+                        skipped.append((path, "changed since it was hashed"))
+                        continue
+                    os.link(keep, tmp_path)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    if os.path.lexists(tmp_path):
+                        os.remove(tmp_path)
+                    skipped.append((path, str(e)))
+                    continue
+                replaced += 1
+                linked.append(path)
+                if cache is not None:
+                    if keep_hashes:
+                        cache.put(path, keep_hashes)
+                    else:
+                        cache.forget([path])
+            if replaced == len(paths):
+                freed += group.size
+    return linked, freed, skipped
@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import zlib
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Hashing agent that runs next to the storage (e.g. on the NAS) so scans
+# only exchange hashes instead of whole files. It needs nothing but the
+# standard library, so this one file can be copied to the NAS and run as:
+#
+#     python hash_agent.py --root /mnt/user/Games/ROMs --host 0.0.0.0
+#
+# POST /hash takes {"paths": [...]} with paths relative to --root and
+# returns {"results": [...]} in the same order, each holding size, mtime,
+# raw/headerless CRC32, md5 and sha1 (or an error). GET /ping reports the
+# agent's root. Clients are configured with the "hash_agent" entry in
+# ROMForge/config.json:
+#
+#     "hash_agent": {"url": "http://unraid:8765", "token": "..."}
+#
+# Local paths under master_rom_path (or the entry's "path_prefix") are
+# hashed by the agent; anything else is hashed locally.
+
+CONFIG_PATH = Path(__file__).parent.resolve() / 'ROMForge' / 'config.json'
+DEFAULT_PORT = 8765
+BATCH_SIZE = 64
+CHUNK_SIZE = 1024 * 1024
+# Same rule as main.has_copier_header; kept here so the agent stays standalone
+COPIER_HEADER_SIZE = 512
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+
+def hash_file(path):
+    # One pass over the file for every digest the scanner may need
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        header = COPIER_HEADER_SIZE if st.st_size % 1024 == COPIER_HEADER_SIZE else 0
+        md5 = hashlib.md5()
+        sha1 = hashlib.sha1()
+        head = f.read(header) if header else b''
+        raw = zlib.crc32(head)
+        md5.update(head)
+        sha1.update(head)
+        body = 0
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            raw = zlib.crc32(chunk, raw)
+            if header:
+                body = zlib.crc32(chunk, body)
+            md5.update(chunk)
+            sha1.update(chunk)
+    result = {
+        'size': st.st_size,
+        'mtime': st.st_mtime_ns,
+        'raw': format(raw & 0xFFFFFFFF, '08x'),
+        'md5': md5.hexdigest(),
+        'sha1': sha1.hexdigest()
+    }
+    if header:
+        result['headerless'] = format(body & 0xFFFFFFFF, '08x')
+    return result
+
+class AgentServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, root, token=None, workers=4):
+        super().__init__(address, AgentHandler)
+        self.root = os.path.realpath(root)
+        self.token = token
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def resolve(self, rel_path):
+        # Refuse anything that escapes the served root
+        path = os.path.realpath(os.path.join(self.root, rel_path.lstrip('/')))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise PermissionError(f"outside agent root: {rel_path}")
+        return path
+
+    def hash_one(self, rel_path):
+        try:
+            return dict(hash_file(self.resolve(rel_path)), path=rel_path)
+        except OSError as e:
+            return {'path': rel_path, 'error': str(e)}
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+class AgentHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        if self.server.token and self.headers.get('X-Agent-Token') != self.server.token:
+            self._send_json(403, {'error': 'bad token'})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != '/ping':
+            self._send_json(404, {'error': 'not found'})
+            return
+        self._send_json(200, {'root': self.server.root})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != '/hash':
+            self._send_json(404, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_BYTES:
+            self._send_json(413, {'error': 'request too large'})
+            return
+        try:
+            paths = json.loads(self.rfile.read(length))['paths']
+            if not all(isinstance(p, str) for p in paths):
+                raise TypeError('paths must be strings')
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f"bad request: {e}"})
+            return
+        results = list(self.server.pool.map(self.server.hash_one, paths))
+        self._send_json(200, {'results': results})
+
+    def log_message(self, format, *args):
+        pass
+
+class HashAgentClient:
+    def __init__(self, url, path_prefix, token=None, timeout=300, batch_size=BATCH_SIZE):
+        import requests
+        self.url = url.rstrip('/')
+        self.path_prefix = self._normalize(path_prefix).rstrip('/') + '/'
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        if token:
+            self.session.headers['X-Agent-Token'] = token
+        self.errors = (requests.RequestException, ValueError, KeyError)
+
+    @staticmethod
+    def _normalize(path):
+        return str(path).replace('\\', '/')
+
+    def remote_path(self, local_path):
+        # Path relative to the agent root, or None if the agent cannot see it
+        path = self._normalize(os.path.abspath(local_path))
+        if sys.platform == 'win32':
+            if not path.lower().startswith(self.path_prefix.lower()):
+                return None
+        elif not path.startswith(self.path_prefix):
+            return None
+        return path[len(self.path_prefix):]
+
+    def ping(self):
+        resp = self.session.get(f"{self.url}/ping", timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def hash_many(self, local_paths):
+        # Returns one result dict per path; failed files carry 'error'
+        resp = self.session.post(f"{self.url}/hash", timeout=self.timeout,
+                                 json={'paths': [self.remote_path(p) for p in local_paths]})
+        resp.raise_for_status()
+        return resp.json()['results']
+
+    def close(self):
+        self.session.close()
+
+def load_agent(config_path=CONFIG_PATH):
+    # HashAgentClient for the configured agent, or None when none is set up
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return None
+    agent = config.get('hash_agent')
+    if not agent or not agent.get('url'):
+        return None
+    prefix = agent.get('path_prefix') or config.get('master_rom_path')
+    if not prefix:
+        print("hash_agent is configured without a path_prefix or master_rom_path; hashing locally.")
+        return None
+    return HashAgentClient(agent['url'], prefix, agent.get('token'), agent.get('timeout', 300))
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve ROM hashes from the machine that stores them')
+    parser.add_argument('--root', required=True, help='library directory as seen on this machine')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--token', default=os.environ.get('HASH_AGENT_TOKEN'),
+                        help='shared secret clients must send (default: $HASH_AGENT_TOKEN)')
+    parser.add_argument('--workers', type=int, default=4, help='files hashed in parallel')
+    args = parser.parse_args()
+    if not os.path.isdir(args.root):
+        parser.error(f"not a directory: {args.root}")
+    server = AgentServer((args.host, args.port), args.root, args.token, args.workers)
+    print(f"Hash agent serving {server.root} on {args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping hash agent.")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
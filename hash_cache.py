@@ -0,0 +1,91 @@
+import os
+import json
+
+# Persistent CRC cache keyed by path, validated against size/mtime/inode
+# so unchanged files never have to be read again.
+
+class HashCache:
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable hash cache {self.cache_path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = str(self.cache_path) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.abspath(file_path)
+
+    @staticmethod
+    def _matches(entry, st):
+        return (entry.get('size') == st.st_size
+                and entry.get('mtime') == st.st_mtime_ns
+                and entry.get('inode') == st.st_ino)
+
+    def get(self, file_path, st=None):
+        if st is None:
+            st = os.stat(file_path)
+        entry = self.entries.get(self._key(file_path))
+        if entry and 'hashes' in entry and self._matches(entry, st):
+            self.hits += 1
+            return entry['hashes']
+        self.misses += 1
+        return None
+
+    def put(self, file_path, hashes, st=None):
+        if st is None:
+            st = os.stat(file_path)
+        self.entries[self._key(file_path)] = {
+            'size': st.st_size,
+            'mtime': st.st_mtime_ns,
+            'inode': st.st_ino,
+            'hashes': hashes
+        }
+        self.dirty = True
+
+    def rename(self, old_path, new_path):
+        entry = self.entries.pop(self._key(old_path), None)
+        if entry is not None:
+            self.entries[self._key(new_path)] = entry
+            self.dirty = True
+
+    def forget(self, paths):
+        for p in paths:
+            if self.entries.pop(self._key(p), None) is not None:
+                self.dirty = True
+
+    def prune(self, root, seen):
+        # Forget files under root that were not seen in the last walk
+        root = self._key(root) + os.sep
+        seen = {self._key(p) for p in seen}
+        stale = [p for p in self.entries if p.startswith(root) and p not in seen]
+        for p in stale:
+            del self.entries[p]
+        if stale:
+            self.dirty = True
+        return len(stale)
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return f"Hash cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
@@ -0,0 +1,70 @@
+import time
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+
+# Pooled requests session shared by the worker threads of a fetcher
+# (cover_fetcher, ROMForge/page_fetcher): GETs to the same host are spaced
+# at least host_interval apart, and connection errors, timeouts and
+# RETRY_STATUS responses are retried with exponential backoff, honouring
+# Retry-After when the server sends one.
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class ThrottledSession:
+    def __init__(self, workers=4, user_agent=None, host_interval=0.5, retries=3, backoff=1.0, timeout=30):
+        self.host_interval = host_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.retry_count = 0
+        self._lock = threading.Lock()
+        self._host_locks = {}
+        self._host_next = {}
+
+    def close(self):
+        self.session.close()
+
+    def _wait_for_host(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        with host_lock:
+            delay = self._host_next.get(host, 0) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._host_next[host] = time.monotonic() + self.host_interval
+
+    def _retry_delay(self, resp, attempt):
+        retry_after = resp.headers.get('Retry-After') if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def get(self, url, **kwargs):
+        # The first response whose status is not retried; raises
+        # RequestException once every attempt has failed
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.retries + 1):
+            self._wait_for_host(url)
+            resp = None
+            try:
+                resp = self.session.get(url, **kwargs)
+                if resp.status_code not in RETRY_STATUS:
+                    return resp
+                resp.close()
+                error = f"HTTP {resp.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt < self.retries:
+                with self._lock:
+                    self.retry_count += 1
+                time.sleep(self._retry_delay(resp, attempt))
+        raise requests.RequestException(f"{url}: giving up after {self.retries + 1} attempts ({error})")
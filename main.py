@@ -1,13 +1,37 @@
 import os
-import requests
-import xmltodict
+import sys
+import time
+import argparse
 import binascii
-import shutil
 from pathlib import Path
-from urllib.parse import quote
-import re
+from collections import deque
+from functools import cached_property, lru_cache
+import mmap
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, Future
+from hash_cache import HashCache
+import dat_index
+import backups
+from organizer import plan_moves, print_plan, execute_plan, safe_name
+from catalog import Catalog
+from reports import write_reports, write_duplicates, REPORTS_DIR
+from metrics import MetricsLog, profiled, profile_path
+from pipeline import run_pipeline, QUEUE_SIZE
+from duplicates import find_duplicates, hardlink_duplicates, wasted_bytes
+
+ROM_EXTS = ('.sfc', '.smc')
+ARCHIVE_EXTS = ('.zip', '.7z')
+COPIER_HEADER_SIZE = 512
+HASH_CHUNK_SIZE = 1024 * 1024
+SYSTEM = 'SNES'
+DAT_FILENAME = "Super_Nintendo_Entertainment_System_No-Intro.dat"
+CACHE_FILENAME = "rom_hash_cache.json"
+INDEX_FILENAME = "dat_index.bin"
+# crc32 releases the GIL on large buffers, so threads scale with the storage
+HASH_WORKERS = int(os.environ.get('ROM_HASH_WORKERS', 0)) or min(32, (os.cpu_count() or 1) + 4)
 
 def download_dat_file(dat_path):
+    import requests  # only needed the first time, so not at startup
     print("Downloading No-Intro SNES DAT file...")
     response = requests.get("https://datomatic.no-intro.org/datfiles/15")
     if response.status_code == 200:
@@ -18,67 +42,387 @@ def download_dat_file(dat_path):
         print("Failed to download DAT file.")
         exit(1)
 
+def _game_field(game, tag):
+    child = game.find(tag)
+    if child is None:
+        return 'Unknown'
+    return child.text.strip() if child.text else None
+
 def parse_dat_file(dat_path):
+    # Stream the DAT and build entries as each <game> closes, clearing the
+    # parsed elements so memory stays flat on MAME/Redump-sized files.
+    import xml.etree.ElementTree as ET  # only needed when the DAT index is rebuilt
     print("Parsing DAT file...")
-    with open(dat_path, "rb") as f:
-        dat = xmltodict.parse(f.read())
     rom_info = {}
-    for game in dat['datafile']['game']:
-        rom = game['rom']
-        genre = game.get('category', 'Unknown')
-        title = game['@name'] if '@name' in game else rom['@name']
-        region = game.get('region', 'Unknown')
-        if isinstance(rom, list):
-            for r in rom:
-                rom_info[r['@crc'].lower()] = {
-                    'name': r['@name'],
-                    'title': title,
-                    'genre': genre,
-                    'region': region,
-                    'ext': os.path.splitext(r['@name'])[1]
-                }
-        else:
-            rom_info[rom['@crc'].lower()] = {
-                'name': rom['@name'],
+    context = ET.iterparse(str(dat_path), events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event != 'end' or elem.tag != 'game':
+            continue
+        roms = elem.findall('rom')
+        genre = _game_field(elem, 'category')
+        region = _game_field(elem, 'region')
+        title = elem.get('name') or (roms[0].get('name') if roms else None)
+        for r in roms:
+            crc = r.get('crc')
+            if not crc:
+                continue
+            size = r.get('size')
+            rom_info[crc.lower()] = {
+                'name': r.get('name'),
                 'title': title,
                 'genre': genre,
                 'region': region,
-                'ext': os.path.splitext(rom['@name'])[1]
+                'ext': os.path.splitext(r.get('name'))[1],
+                'size': int(size) if size and size.isdigit() else None
             }
+        root.clear()
     return rom_info
 
-def compute_crc32(file_path):
-    buf_size = 65536
+def load_rom_info(dat_path, index_path, system='SNES'):
+    # Memory-map the compiled DAT index, compiling it first if the DAT is
+    # newer; falls back to a plain dict if the index cannot be written
+    try:
+        return dat_index.load_index(index_path, {system: dat_path}, parse_dat_file).system(system)
+    except OSError as e:
+        print(f"Could not use DAT index {index_path}: {e}")
+        return parse_dat_file(dat_path)
+
+def build_size_index(rom_info):
+    # Map ROM size -> candidate CRCs. Returns None when some entry has no
+    # size, since then no file can be ruled out by size alone.
+    if isinstance(rom_info, dat_index.SystemIndex):
+        return rom_info.size_index()
+    size_index = {}
+    for crc, info in rom_info.items():
+        if info.get('size') is None:
+            return None
+        size_index.setdefault(info['size'], []).append(crc)
+    return size_index
+
+def crc32_stream(f, buf_size=65536):
     crc = 0
-    with open(file_path, 'rb') as f:
-        while True:
-            data = f.read(buf_size)
-            if not data:
-                break
-            crc = binascii.crc32(data, crc)
+    while True:
+        data = f.read(buf_size)
+        if not data:
+            break
+        crc = binascii.crc32(data, crc)
     return format(crc & 0xFFFFFFFF, '08x')
 
-def download_cover(game_title, covers_dir):
-    search_url = f"https://www.bing.com/images/search?q={quote(game_title + ' SNES cover')}&form=HDRSC2"
-    headers = {"User-Agent": "Mozilla/5.0"}
+def has_copier_header(size):
+    return size % 1024 == COPIER_HEADER_SIZE
+
+def _crc32_views(read, header):
+    # read(n) returns the next n bytes; with a copier header the body is
+    # hashed into both views in the same pass
+    raw = binascii.crc32(read(header)) if header else 0
+    body = 0
+    while True:
+        chunk = read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        raw = binascii.crc32(chunk, raw)
+        if header:
+            body = binascii.crc32(chunk, body)
+    views = {'raw': format(raw & 0xFFFFFFFF, '08x')}
+    if header:
+        views['headerless'] = format(body & 0xFFFFFFFF, '08x')
+    return views
+
+def compute_crc32_views(file_path, cache=None):
+    # Returns {'raw': crc} plus 'headerless' for files that look like they
+    # carry a 512-byte copier header. Hashes straight from a memory map.
+    if cache is not None:
+        st = os.stat(file_path)
+        views = cache.get(file_path, st)
+        if views is not None:
+            return views
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        header = COPIER_HEADER_SIZE if has_copier_header(size) else 0
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and some network filesystems cannot be mapped
+            views = _crc32_views(f.read, header)
+        else:
+            with mm:
+                view = memoryview(mm)
+                pos = 0
+                def read(n):
+                    nonlocal pos
+                    chunk = view[pos:pos + n]
+                    pos += len(chunk)
+                    return chunk
+                views = _crc32_views(read, header)
+                view.release()
+    if cache is not None:
+        cache.put(file_path, views, st)
+    return views
+
+def compute_crc32(file_path, cache=None):
+    return compute_crc32_views(file_path, cache)['raw']
+
+def match_views(views, rom_info):
+    # Returns (crc, view name) for the first view found in the DAT
+    for view in ('raw', 'headerless'):
+        crc = views.get(view)
+        if crc in rom_info:
+            return crc, view
+    return None, None
+
+@lru_cache(maxsize=None)
+def _import_py7zr():
+    # Resolved on first use (it is slow to import) and only once, so the
+    # warning is printed once per run
     try:
-        resp = requests.get(search_url, headers=headers, timeout=10)
-        if resp.status_code == 200:
-            match = re.search(r'imgurl:&quot;(https://[^&]+)', resp.text)
-            if match:
-                img_url = match.group(1)
-                img_ext = os.path.splitext(img_url)[1].split('?')[0]
-                cover_path = os.path.join(covers_dir, f"{game_title}{img_ext}")
-                img_resp = requests.get(img_url, stream=True, timeout=10)
-                if img_resp.status_code == 200:
-                    with open(cover_path, 'wb') as f:
-                        shutil.copyfileobj(img_resp.raw, f)
-                    print(f"Downloaded cover for {game_title}")
-                    return cover_path
-    except Exception as e:
-        print(f"Failed to download cover for {game_title}: {e}")
+        import py7zr
+    except ImportError:
+        print("py7zr is not installed; skipping .7z archives.")
+        return None
+    return py7zr
+
+def _archive_errors():
+    errors = (zipfile.BadZipFile, OSError, EOFError)
+    py7zr = _import_py7zr()
+    if py7zr is not None:
+        errors += (py7zr.exceptions.ArchiveError,)
+    return errors
+
+def list_archive_members(archive_path):
+    # Read (name, size, crc) for every member from the archive index only
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as zf:
+            return [(i.filename, i.file_size, format(i.CRC, '08x'))
+                    for i in zf.infolist() if not i.is_dir()]
+    py7zr = _import_py7zr()
+    with py7zr.SevenZipFile(archive_path, 'r') as zf:
+        return [(i.filename, i.uncompressed, format(i.crc32, '08x') if i.crc32 is not None else None)
+                for i in zf.list() if not i.is_directory]
+
+def deep_check_archive(archive_path):
+    # Decompress every member and compare against the stored CRCs
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                with zf.open(info) as f:
+                    if crc32_stream(f) != format(info.CRC, '08x'):
+                        return False
+        return True
+    py7zr = _import_py7zr()
+    with py7zr.SevenZipFile(archive_path, 'r') as zf:
+        return zf.testzip() is None
+
+def _member_size_ok(size, info):
+    # A member matching on CRC alone may be truncated or a collision
+    expected = info.get('size')
+    return expected is None or size == expected
+
+def verify_archive(archive_path, rom_info, deep=False):
+    # Returns the CRC of the first member found in the DAT, or None
+    try:
+        members = list_archive_members(archive_path)
+        match = next((crc for _, size, crc in members if crc in rom_info and _member_size_ok(size, rom_info[crc])),
+                     None)
+        if match is not None and deep and not deep_check_archive(archive_path):
+            print(f"Corrupt archive: {archive_path}")
+            return None
+        return match
+    except _archive_errors() as e:
+        print(f"Corrupt archive: {archive_path}: {e}")
     return None
 
+def rom_extensions():
+    if _import_py7zr() is None:
+        return ROM_EXTS + tuple(e for e in ARCHIVE_EXTS if e != '.7z')
+    return ROM_EXTS + ARCHIVE_EXTS
+
+def iter_rom_files(rom_dir):
+    exts = rom_extensions()
+    for root, _, files in os.walk(rom_dir):
+        for file in files:
+            if file.lower().endswith(exts):
+                yield file, os.path.join(root, file)
+
+def _archive_views(archive_path, rom_info, deep):
+    crc = verify_archive(archive_path, rom_info, deep)
+    return {'raw': crc} if crc is not None else None
+
+def _size_may_match(size, size_index):
+    if size in size_index:
+        return True
+    return has_copier_header(size) and size - COPIER_HEADER_SIZE in size_index
+
+def _agent_views(result):
+    return {k: result[k] for k in ('raw', 'headerless', 'md5', 'sha1') if k in result}
+
+def _hash_with_agent(agent, batch):
+    # batch is a list of (path, Future); falls back to local hashing for
+    # files the agent could not read or when the agent is unreachable.
+    # Every future is resolved whatever happens here, since the scan
+    # blocks on them.
+    try:
+        try:
+            results = agent.hash_many([path for path, _ in batch])
+            if not isinstance(results, list) or len(results) != len(batch):
+                count = len(results) if isinstance(results, list) else type(results).__name__
+                raise ValueError(f"agent returned {count} results for {len(batch)} files")
+        except agent.errors as e:
+            print(f"Hash agent unavailable ({e}); hashing {len(batch)} files locally.")
+            results = [{'error': str(e)}] * len(batch)
+        for (path, future), result in zip(batch, results):
+            if isinstance(result, dict) and 'error' not in result:
+                future.set_result(_agent_views(result))
+                continue
+            try:
+                future.set_result(compute_crc32_views(path))
+            except OSError as e:
+                future.set_exception(e)
+    except BaseException as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        raise
+
+def iter_scan(files, rom_info, cache=None, workers=HASH_WORKERS, size_index=None, deep=False, agent=None,
+              window=None):
+    # files yields (name, path) pairs, typically from a directory walk.
+    # Files are hashed on a thread pool while the walk continues and
+    # (file, path, info, record) is yielded for each one in walk order, so
+    # output matches a serial scan; info is None for bad files and record
+    # is the file's catalog row (None if it could not be read). At most
+    # `window` files are in flight, which keeps memory flat on huge trees
+    # and lets a consumer act on each result while later files hash. Files
+    # whose size matches no DAT entry are marked bad without being read.
+    # Archives are matched from their index CRCs unless deep is set. Each
+    # good entry's info records the matched CRC and which hash view ('raw'
+    # or 'headerless') matched. With a hash agent, plain ROMs it can see
+    # are hashed remotely in batches instead of read over the network.
+    if window is None:
+        window = max(workers * 4, 2 * agent.batch_size if agent is not None else 0)
+    pending = deque()
+    agent_batch = []
+    batched = set()  # futures in agent_batch, not yet sent to the agent
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def flush_agent_batch():
+            nonlocal agent_batch
+            if agent_batch:
+                pool.submit(_hash_with_agent, agent, agent_batch)
+                agent_batch = []
+                batched.clear()
+
+        def finish(file, file_path, st, views):
+            if isinstance(views, Future):
+                try:
+                    views = views.result()
+                except Exception as e:
+                    print(f"Cannot read {file_path}: {e}")
+                    return file, file_path, None, None
+                if views is not None and cache is not None:
+                    cache.put(file_path, views, st)
+            crc, view = match_views(views, rom_info) if views is not None else (None, None)
+            info = dict(rom_info[crc], crc=crc, view=view) if crc is not None else None
+            record = {
+                'path': file_path,
+                'size': st.st_size,
+                'mtime': st.st_mtime_ns,
+                'crc32': views.get('raw') if views else None,
+                'crc32_headerless': views.get('headerless') if views else None,
+                'match_crc': crc,
+                'match_view': view,
+                'status': 'good' if crc is not None else 'bad'
+            }
+            return file, file_path, info, record
+
+        for file, file_path in files:
+            try:
+                st = os.stat(file_path)
+            except OSError as e:
+                print(f"Cannot read {file_path}: {e}")
+                pending.append((file, file_path, None, None))
+                continue
+            if file.lower().endswith(ARCHIVE_EXTS):
+                views = cache.get(file_path, st) if cache is not None and not deep else None
+                if views is None:
+                    views = pool.submit(_archive_views, file_path, rom_info, deep)
+            elif size_index is not None and not _size_may_match(st.st_size, size_index):
+                views = None
+            else:
+                views = cache.get(file_path, st) if cache is not None else None
+                if views is None and agent is not None and agent.remote_path(file_path) is not None:
+                    views = Future()
+                    agent_batch.append((file_path, views))
+                    batched.add(views)
+                    if len(agent_batch) >= agent.batch_size:
+                        flush_agent_batch()
+                elif views is None:
+                    views = pool.submit(compute_crc32_views, file_path)
+            pending.append((file, file_path, st, views))
+            while len(pending) >= window:
+                # Send a partial agent batch early only when the oldest
+                # file is waiting in it
+                oldest = pending[0][3]
+                if isinstance(oldest, Future) and oldest in batched:
+                    flush_agent_batch()
+                entry = pending.popleft()
+                yield finish(*entry) if entry[2] is not None else entry
+        flush_agent_batch()
+        while pending:
+            entry = pending.popleft()
+            yield finish(*entry) if entry[2] is not None else entry
+
+def collect_scan(results, records=None):
+    # (good, bad) lists from iter_scan results; catalog rows go to records
+    good = []
+    bad = []
+    for file, file_path, info, record in results:
+        if info is not None:
+            good.append((file, file_path, info))
+        else:
+            bad.append(file)
+        if records is not None and record is not None:
+            records.append(record)
+    return good, bad
+
+def scan_files(files, rom_info, cache=None, workers=HASH_WORKERS, size_index=None, deep=False, records=None,
+               agent=None):
+    # If records is a list, one catalog record per scanned file is appended
+    return collect_scan(iter_scan(files, rom_info, cache, workers, size_index, deep, agent), records)
+
+def iter_scan_roms(rom_dir, rom_info, cache=None, workers=HASH_WORKERS, size_index=None, deep=False, agent=None,
+                   stats=None, prune=True):
+    # iter_scan over a directory tree. If stats is a dict, the time spent
+    # walking the tree is added to its 'walk_s' (the walk overlaps hashing,
+    # so it is not a stage of its own). Cache entries for files that are
+    # gone are pruned once the walk completes, unless files are being
+    # moved while the walk runs (the caller prunes afterwards).
+    seen = []
+    def walk():
+        files = iter_rom_files(rom_dir)
+        while True:
+            start = time.perf_counter()
+            item = next(files, None)
+            if stats is not None:
+                stats['walk_s'] = stats.get('walk_s', 0) + time.perf_counter() - start
+            if item is None:
+                return
+            seen.append(item[1])
+            yield item
+    yield from iter_scan(walk(), rom_info, cache, workers, size_index, deep, agent)
+    if cache is not None and prune:
+        cache.prune(rom_dir, seen)
+
+def scan_roms(rom_dir, rom_info, cache=None, workers=HASH_WORKERS, size_index=None, deep=False, records=None,
+              agent=None, stats=None):
+    return collect_scan(iter_scan_roms(rom_dir, rom_info, cache, workers, size_index, deep, agent, stats), records)
+
+def download_cover(game_title, covers_dir):
+    from cover_fetcher import CoverFetcher
+    with CoverFetcher(covers_dir, workers=1) as fetcher:
+        return fetcher.fetch(game_title)
+
 def menu():
     print("\nSNES ROM Manager")
     print("1. Check ROM health")
@@ -86,6 +430,10 @@ def menu():
     print("3. Download covers for good ROMs")
     print("4. Show missing games report")
     print("5. Run all (recommended)")
+    print("6. Deep-check ROMs (decompress and re-hash archives)")
+    print("7. Preview sort (dry run)")
+    print("8. Show collection report by genre and region")
+    print("9. Find duplicate ROMs (replace copies with hardlinks)")
     print("0. Exit")
     return input("Select an option: ").strip()
 
@@ -96,12 +444,134 @@ def get_rom_dir():
         return None
     return rom_dir
 
+def load_library(catalog, metrics):
+    # Load the DAT (downloading it the first time) and sync it into the catalog
+    with metrics.stage('dat_load') as m:
+        dat_path = Path(DAT_FILENAME)
+        if not dat_path.exists():
+            download_dat_file(dat_path)
+        rom_info = load_rom_info(dat_path, INDEX_FILENAME)
+        size_index = build_size_index(rom_info)
+        m['entries'] = len(rom_info)
+    if catalog.sync_dat(SYSTEM, rom_info, dat_index.dat_fingerprint(dat_path)):
+        print("Catalog updated with the current DAT.")
+    return rom_info, size_index
+
+def get_agent():
+    from hash_agent import load_agent
+    agent = load_agent()
+    if agent:
+        print(f"Hashing files under {agent.path_prefix} with the agent at {agent.url}")
+    return agent
+
+def run_scan(rom_dir, rom_info, size_index, hash_cache, catalog, metrics, deep=False, agent=None,
+             workers=HASH_WORKERS):
+    hash_cache.hits = hash_cache.misses = 0
+    records = []
+    with metrics.stage('scan') as m:
+        good, bad = scan_roms(rom_dir, rom_info, hash_cache, workers, size_index=size_index,
+                              deep=deep, records=records, agent=agent, stats=m)
+        hash_cache.save()
+        m.update(files=len(records), bytes=sum(r['size'] for r in records), good=len(good),
+                 bad=len(bad), cache_hits=hash_cache.hits, cache_misses=hash_cache.misses)
+    with metrics.stage('report') as m:
+        catalog.record_scan(SYSTEM, rom_dir, records)
+        m.update(write_reports(catalog, SYSTEM))
+    return good, bad
+
+def run_sort(good, moves, skipped, rom_dir, hash_cache, catalog, metrics):
+    # Executes a plan from plan_moves; returns good with the new paths
+    print("\nSorting and renaming good ROMs...")
+    for file, reason in skipped:
+        print(f"Skipping {file}: {reason}")
+    with metrics.stage('sort') as m:
+        moved, failed = execute_plan(moves, HASH_WORKERS, hash_cache)
+        m.update(files=len(moved), bytes=sum(mv.size for mv in moved), failed=len(failed),
+                 skipped=len(skipped), copied=sum(1 for mv in moved if mv.cross_device))
+    for mv in moved:
+        print(f"Moved: {mv.file} -> {mv.dst}")
+    new_paths = {mv.src: mv.dst for mv in moved}
+    catalog.move_files(new_paths.items())
+    for mv, e in failed:
+        print(f"Failed to move {mv.file}: {e}")
+    hash_cache.save()
+    return [(file, new_paths.get(file_path, file_path), info) for file, file_path, info in good]
+
+def run_covers(good, covers_dir, catalog, metrics):
+    from cover_fetcher import CoverFetcher
+    print("\nDownloading covers for good ROMs...")
+    titles = {safe_name(info['title']): info['title'] for _, _, info in good}
+    with metrics.stage('covers') as m, CoverFetcher(covers_dir) as fetcher:
+        results = fetcher.fetch_all(titles)
+        m.update(files=len(results), found=sum(1 for path in results.values() if path),
+                 retries=fetcher.retry_count)
+    catalog.record_covers({titles[name]: path for name, path in results.items()})
+    found = sum(1 for path in results.values() if path)
+    print(f"Covers: {found} of {len(results)} titles have art ({fetcher.retry_count} retries).")
+
+def run_duplicates(roots, hash_cache, metrics, exts=None, min_size=1):
+    # Find duplicates, print the largest groups and write duplicates.csv
+    print("\nLooking for duplicate files...")
+    with metrics.stage('duplicates') as m:
+        groups = find_duplicates(roots, hash_cache, exts, min_size, workers=HASH_WORKERS, stats=m)
+        hash_cache.save()
+        m.update(groups=len(groups), wasted_bytes=wasted_bytes(groups))
+    for group in groups[:10]:
+        print(f"  {len(group.files)} copies of {group.size / (1024 * 1024):.1f} MB: {group.files[0][0]}")
+        for paths in group.files[1:]:
+            print(f"      {paths[0]}")
+    if len(groups) > 10:
+        print(f"  ... and {len(groups) - 10} more groups")
+    report_path = write_duplicates(groups)
+    copies = sum(len(g.files) - 1 for g in groups)
+    print(f"Duplicates: {copies} extra copies in {len(groups)} groups, "
+          f"{wasted_bytes(groups) / (1024 * 1024):.1f} MB wasted (full list in {report_path}).")
+    print(f"Read {m['bytes_read'] / (1024 * 1024):.1f} MB: {m['quick_hashed']} quick hashes, "
+          f"{m['full_hashed']} full hashes, {m['cache_reused']} cached hashes reused.")
+    return groups
+
+def run_dedupe(groups, hash_cache, metrics):
+    with metrics.stage('dedupe') as m:
+        linked, freed, skipped = hardlink_duplicates(groups, hash_cache)
+        hash_cache.save()
+        m.update(files=len(linked), bytes=freed, skipped=len(skipped))
+    for path, reason in skipped:
+        print(f"Not linked {path}: {reason}")
+    print(f"Replaced {len(linked)} copies with hardlinks, freeing {freed / (1024 * 1024):.1f} MB.")
+
+def print_coverage(catalog):
+    for field in ('genre', 'region'):
+        print(f"\nCollection by {field}:")
+        for value, owned, total in catalog.coverage(SYSTEM, field):
+            print(f"  {value}: {owned}/{total}")
+
+class Session:
+    # State behind the interactive menu. The catalog, DAT index, hash cache
+    # and agent are loaded by the first option that needs them, so the
+    # menu comes up without waiting for any of them.
+    def __init__(self):
+        self.metrics = MetricsLog()
+
+    @cached_property
+    def catalog(self):
+        return Catalog()
+
+    @cached_property
+    def library(self):
+        # (rom_info, size_index); loading it also syncs the catalog's DAT entries
+        return load_library(self.catalog, self.metrics)
+
+    @cached_property
+    def hash_cache(self):
+        return HashCache(CACHE_FILENAME)
+
+    @cached_property
+    def agent(self):
+        return get_agent()
+
 def main():
-    DAT_FILENAME = "Super_Nintendo_Entertainment_System_No-Intro.dat"
-    dat_path = Path(DAT_FILENAME)
-    if not dat_path.exists():
-        download_dat_file(dat_path)
-    rom_info = parse_dat_file(dat_path)
+    session = Session()
+    metrics = session.metrics
     rom_dir = None
     good = []
     bad = []
@@ -116,70 +586,216 @@ def main():
                 continue
             covers_dir = os.path.join(rom_dir, 'Covers')
             os.makedirs(covers_dir, exist_ok=True)
-        if choice in {'1', '5'}:
+            good = session.catalog.good_files(SYSTEM, rom_dir)
+            if good:
+                print(f"Loaded {len(good)} verified ROMs from the catalog.")
+        if choice in {'1', '5', '6'}:
             print("\nChecking ROMs...")
-            good.clear()
-            bad.clear()
-            for root, _, files in os.walk(rom_dir):
-                for file in files:
-                    if file.lower().endswith(('.sfc', '.smc')):
-                        file_path = os.path.join(root, file)
-                        crc = compute_crc32(file_path)
-                        if crc in rom_info:
-                            good.append((file, file_path, rom_info[crc]))
-                        else:
-                            bad.append(file)
+            rom_info, size_index = session.library
+            good, bad = run_scan(rom_dir, rom_info, size_index, session.hash_cache, session.catalog, metrics,
+                                 deep=(choice == '6'), agent=session.agent)
             print("\nGood ROMs:")
             for file, _, info in good:
-                print(f"  {file} (matches: {info['title']})")
+                header_note = ' [copier header]' if info.get('view') == 'headerless' else ''
+                print(f"  {file} (matches: {info['title']}){header_note}")
             print("\nBad ROMs:")
             for file in bad:
                 print(f"  {file}")
             print(f"\nSummary: {len(good)} good, {len(bad)} bad.")
-            if choice == '1':
+            print(session.hash_cache.summary())
+            if choice in {'1', '6'}:
+                continue
+        if choice in {'2', '5', '7'}:
+            moves, skipped = plan_moves(good, rom_dir)
+            if choice == '7':
+                print("\nSort plan (dry run, nothing will be moved):")
+                print_plan(moves, skipped)
                 continue
-        if choice in {'2', '5'}:
-            print("\nSorting and renaming good ROMs...")
-            for file, file_path, info in good:
-                genre = info['genre'] or 'Unknown'
-                first_letter = info['title'][0].upper() if info['title'] else 'U'
-                region = info['region'] or 'Unknown'
-                ext = info['ext']
-                safe_title = ''.join(c for c in info['title'] if c not in '\/:*?"<>|').strip()
-                new_name = f"{safe_title} ({region}){ext}"
-                target_dir = os.path.join(rom_dir, genre, first_letter)
-                os.makedirs(target_dir, exist_ok=True)
-                target_path = os.path.join(target_dir, new_name)
-                if os.path.abspath(file_path) != os.path.abspath(target_path):
-                    try:
-                        os.rename(file_path, target_path)
-                        print(f"Moved: {file} -> {target_path}")
-                    except Exception as e:
-                        print(f"Failed to move {file}: {e}")
+            if moves and input("Snapshot ROMs to ROMForge/Backups before sorting? (y/N): ").strip().lower() == 'y':
+                backups.snapshot([m.src for m in moves], rom_dir, label='pre-sort')
+            good = run_sort(good, moves, skipped, rom_dir, session.hash_cache, session.catalog, metrics)
             if choice == '2':
                 continue
         if choice in {'3', '5'}:
-            print("\nDownloading covers for good ROMs...")
-            for file, _, info in good:
-                safe_title = ''.join(c for c in info['title'] if c not in '\/:*?"<>|').strip()
-                cover_filename = f"{safe_title}.jpg"
-                cover_path = os.path.join(covers_dir, cover_filename)
-                if not os.path.exists(cover_path):
-                    download_cover(safe_title, covers_dir)
+            run_covers(good, covers_dir, session.catalog, metrics)
             if choice == '3':
                 continue
         if choice in {'4', '5'}:
+            session.library  # reports need the current DAT in the catalog
             print("\nMissing SNES Games (compared to full Nintendo list):")
-            all_titles = set(info['title'] for info in rom_info.values())
-            found_titles = set(info['title'] for _, _, info in good)
-            missing_titles = sorted(all_titles - found_titles)
+            missing_titles = session.catalog.missing(SYSTEM)
             for title in missing_titles:
                 print(f"  {title}")
             print(f"\nTotal missing: {len(missing_titles)}")
             if choice == '4':
                 continue
-        if choice not in {'1','2','3','4','5','0'}:
+        if choice == '8':
+            session.library
+            print_coverage(session.catalog)
+            continue
+        if choice == '9':
+            groups = run_duplicates([rom_dir], session.hash_cache, metrics)
+            wasted = wasted_bytes(groups)
+            if groups and input(f"Replace the extra copies with hardlinks to free {wasted / (1024 * 1024):.1f} MB? "
+                                "(y/N): ").strip().lower() == 'y':
+                run_dedupe(groups, session.hash_cache, metrics)
+            continue
+        if choice not in {'1','2','3','4','5','6','7','8','9','0'}:
             print("Invalid option.")
 
+# --- Headless commands ---
+
+def require_dir(rom_dir):
+    if not os.path.isdir(rom_dir):
+        raise SystemExit(f"Not a directory: {rom_dir}")
+    return rom_dir
+
+def catalog_good(catalog, rom_dir):
+    good = catalog.good_files(SYSTEM, rom_dir)
+    if not good:
+        raise SystemExit(f"No verified ROMs under {rom_dir} in the catalog; run 'scan' first.")
+    return good
+
+def cmd_scan(args, metrics):
+    rom_dir = require_dir(args.rom_dir)
+    with Catalog() as catalog:
+        rom_info, size_index = load_library(catalog, metrics)
+        hash_cache = HashCache(CACHE_FILENAME)
+        good, bad = run_scan(rom_dir, rom_info, size_index, hash_cache, catalog, metrics, deep=args.deep,
+                             agent=get_agent(), workers=args.workers)
+    for file in bad:
+        print(f"Bad: {file}")
+    print(f"Summary: {len(good)} good, {len(bad)} bad.")
+    print(hash_cache.summary())
+
+def cmd_organize(args, metrics):
+    rom_dir = require_dir(args.rom_dir)
+    with Catalog() as catalog:
+        good = catalog_good(catalog, rom_dir)
+        moves, skipped = plan_moves(good, rom_dir)
+        if args.dry_run:
+            print_plan(moves, skipped)
+            return
+        if moves and args.backup:
+            backups.snapshot([m.src for m in moves], rom_dir, label='pre-sort')
+        run_sort(good, moves, skipped, rom_dir, HashCache(CACHE_FILENAME), catalog, metrics)
+
+def cmd_covers(args, metrics):
+    rom_dir = require_dir(args.rom_dir)
+    covers_dir = os.path.join(rom_dir, 'Covers')
+    os.makedirs(covers_dir, exist_ok=True)
+    with Catalog() as catalog:
+        run_covers(catalog_good(catalog, rom_dir), covers_dir, catalog, metrics)
+
+def cmd_report(args, metrics):
+    with Catalog() as catalog:
+        load_library(catalog, metrics)
+        with metrics.stage('report') as m:
+            counts = write_reports(catalog, SYSTEM)
+            m.update(counts)
+        if args.missing:
+            for title in catalog.missing(SYSTEM):
+                print(f"  {title}")
+        if args.coverage:
+            print_coverage(catalog)
+    print(f"Catalog: {counts['good']} good, {counts['bad']} bad, {counts['missing']} missing titles "
+          f"(reports in {REPORTS_DIR}).")
+
+def cmd_duplicates(args, metrics):
+    roots = [require_dir(root) for root in args.roots]
+    exts = tuple(e.lower() if e.startswith('.') else '.' + e.lower() for e in args.ext) if args.ext else None
+    hash_cache = HashCache(CACHE_FILENAME)
+    groups = run_duplicates(roots, hash_cache, metrics, exts, args.min_size)
+    if args.hardlink and groups:
+        run_dedupe(groups, hash_cache, metrics)
+
+def cmd_run(args, metrics):
+    # scan -> organize -> covers as one stream, then the catalog and reports
+    rom_dir = require_dir(args.rom_dir)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    with Catalog() as catalog:
+        rom_info, size_index = load_library(catalog, metrics)
+        hash_cache = HashCache(CACHE_FILENAME)
+        if args.backup and not args.no_organize:
+            backups.snapshot([path for _, path in iter_rom_files(rom_dir)], rom_dir, label='pre-sort')
+        covers = None
+        if not args.no_covers:
+            from cover_fetcher import CoverFetcher
+            covers_dir = os.path.join(rom_dir, 'Covers')
+            os.makedirs(covers_dir, exist_ok=True)
+            covers = CoverFetcher(covers_dir, workers=args.cover_workers)
+        results = iter_scan_roms(rom_dir, rom_info, hash_cache, args.workers, size_index, args.deep,
+                                 get_agent(), prune=False)
+        try:
+            summary = run_pipeline(results, None if args.no_organize else rom_dir, hash_cache, covers,
+                                   args.queue_size, args.sort_workers, metrics)
+        finally:
+            if covers is not None:
+                covers.close()
+        new_paths = {mv.src: mv.dst for mv in summary['moved']}
+        hash_cache.prune(rom_dir, [new_paths.get(r['path'], r['path']) for r in summary['records']])
+        hash_cache.save()
+        with metrics.stage('report') as m:
+            catalog.record_scan(SYSTEM, rom_dir, summary['records'])
+            catalog.move_files(new_paths.items())
+            catalog.record_covers(summary['covers'])
+            m.update(write_reports(catalog, SYSTEM))
+    good, bad = summary['good'], summary['bad']
+    found = sum(1 for path in summary['covers'].values() if path)
+    metrics.record('run', time.perf_counter() - wall, time.process_time() - cpu, {
+        'files': len(summary['records']), 'good': len(good), 'bad': len(bad), 'moved': len(summary['moved']),
+        'covers': found, 'cache_hits': hash_cache.hits, 'cache_misses': hash_cache.misses})
+    print(f"Summary: {len(good)} good, {len(bad)} bad, {len(summary['moved'])} moved, "
+          f"{len(summary['failed'])} failed, {len(summary['skipped'])} skipped.")
+    if covers is not None:
+        print(f"Covers: {found} of {len(summary['covers'])} titles have art ({summary['retries']} retries).")
+    print(hash_cache.summary())
+
+COMMANDS = {'scan': cmd_scan, 'organize': cmd_organize, 'covers': cmd_covers, 'report': cmd_report,
+            'run': cmd_run, 'duplicates': cmd_duplicates}
+
+def cli(argv=None):
+    # Without a command the interactive menu runs, as before
+    parser = argparse.ArgumentParser(description='SNES ROM Manager')
+    parser.add_argument('--profile', nargs='?', const='', metavar='STATS_FILE',
+                        help='run under cProfile and write pstats (default: ROMForge/Reports/profile-<time>.prof)')
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    scan = commands.add_parser('scan', help='verify ROMs against the DAT and update the catalog')
+    organize = commands.add_parser('organize', help='sort verified ROMs into genre/letter folders')
+    covers = commands.add_parser('covers', help='download covers for verified ROMs')
+    report = commands.add_parser('report', help='write the report files from the catalog')
+    run = commands.add_parser('run', help='scan, organize and fetch covers as one streaming pipeline')
+    dupes = commands.add_parser('duplicates', help='find duplicate files and optionally hardlink them')
+    for sub in (scan, organize, covers, run):
+        sub.add_argument('rom_dir', help='SNES ROM directory')
+    for sub in (scan, run):
+        sub.add_argument('--deep', action='store_true', help='decompress and re-hash archives')
+        sub.add_argument('--workers', type=int, default=HASH_WORKERS, help='hashing threads')
+    for sub in (organize, run):
+        sub.add_argument('--backup', action='store_true', help='snapshot ROMs to ROMForge/Backups first')
+    organize.add_argument('--dry-run', action='store_true', help='print the plan without moving anything')
+    report.add_argument('--missing', action='store_true', help='list the missing titles')
+    report.add_argument('--coverage', action='store_true', help='show the collection by genre and region')
+    dupes.add_argument('roots', nargs='+', help='folders to search (e.g. a ROM folder and ROMForge/Consoles)')
+    dupes.add_argument('--ext', nargs='*', help='only files with these extensions (default: all files)')
+    dupes.add_argument('--min-size', type=int, default=1, help='ignore files smaller than this many bytes')
+    dupes.add_argument('--hardlink', action='store_true', help='replace extra copies with hardlinks')
+    run.add_argument('--no-organize', action='store_true', help='leave files where they are')
+    run.add_argument('--no-covers', action='store_true', help='skip cover downloads')
+    run.add_argument('--queue-size', type=int, default=QUEUE_SIZE, help='items buffered between stages')
+    run.add_argument('--sort-workers', type=int, default=4, help='threads moving files')
+    run.add_argument('--cover-workers', type=int, default=8, help='threads downloading covers')
+    args = parser.parse_args(argv)
+    if args.command is None:
+        target = main
+    else:
+        target = lambda: COMMANDS[args.command](args, MetricsLog())
+    if args.profile is None:
+        target()
+        return
+    with profiled(args.profile or profile_path()):
+        target()
+
 if __name__ == "__main__":
-    main()
+    cli(sys.argv[1:])
@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import cProfile
+import threading
+import contextlib
+from reports import REPORTS_DIR
+
+# Structured per-stage metrics, appended as JSON lines to
+# ROMForge/Reports/metrics.jsonl. Every line carries the run id, the stage
+# name, wall and CPU time (CPU covers all threads of the process), the
+# counters the stage recorded (files, bytes, cache_hits, retries, ...) and
+# the rates derived from them, so runs can be compared with jq or pandas.
+
+METRICS_FILENAME = 'metrics.jsonl'
+
+class MetricsLog:
+    def __init__(self, reports_dir=REPORTS_DIR, run_id=None):
+        self.path = os.path.join(reports_dir, METRICS_FILENAME)
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._lock = threading.Lock()
+        os.makedirs(reports_dir, exist_ok=True)
+
+    def write(self, record):
+        line = json.dumps(dict({'run': self.run_id, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}, **record))
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    def record(self, name, wall_s, cpu_s, counters, error=None):
+        record = {'stage': name, 'wall_s': round(wall_s, 6), 'cpu_s': round(cpu_s, 6)}
+        record.update((k, round(v, 6) if isinstance(v, float) else v) for k, v in counters.items())
+        record.update(rates(record))
+        if error:
+            record['error'] = error
+        self.write(record)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # Yields a dict for the stage's counters; the record is written
+        # when the block exits, with the error if it raised
+        counters = {}
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        error = None
+        try:
+            yield counters
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.record(name, time.perf_counter() - wall, time.process_time() - cpu, counters, error)
+
+def rates(record):
+    wall = record['wall_s']
+    derived = {}
+    if wall > 0 and 'files' in record:
+        derived['files_per_s'] = round(record['files'] / wall, 2)
+    if wall > 0 and 'bytes' in record:
+        derived['mb_per_s'] = round(record['bytes'] / (1024 * 1024) / wall, 2)
+    lookups = record.get('cache_hits', 0) + record.get('cache_misses', 0)
+    if lookups:
+        derived['cache_hit_rate'] = round(record['cache_hits'] / lookups, 4)
+    return derived
+
+@contextlib.contextmanager
+def profiled(stats_path):
+    # cProfile the block and dump pstats to stats_path (load it with
+    # pstats or snakeviz). Only the calling thread is profiled; time spent
+    # in worker threads shows up as waits on their futures.
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(stats_path) or '.', exist_ok=True)
+        profiler.dump_stats(stats_path)
+        print(f"Profile written to {stats_path}")
+
+def profile_path(reports_dir=REPORTS_DIR):
+    return os.path.join(reports_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}.prof")
@@ -0,0 +1,171 @@
+import os
+import errno
+import shutil
+import binascii
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Sort stage split into planning and execution: the whole move plan is
+# computed first, target directories are created once, same-device moves
+# are plain renames and cross-device moves run as parallel
+# copy + verify + unlink jobs.
+
+Move = namedtuple('Move', 'file src dst size cross_device')
+
+ARCHIVE_EXTS = ('.zip', '.7z')
+COPY_CHUNK_SIZE = 1024 * 1024
+
+def safe_name(title):
+    return ''.join(c for c in title if c not in '\\/:*?"<>|').strip()
+
+def target_path_for(file_path, info, dest_root):
+    genre = info['genre'] or 'Unknown'
+    first_letter = info['title'][0].upper() if info['title'] else 'U'
+    region = info['region'] or 'Unknown'
+    ext = info['ext']
+    if file_path.lower().endswith(ARCHIVE_EXTS):
+        ext = os.path.splitext(file_path)[1]
+    new_name = f"{safe_name(info['title'])} ({region}){ext}"
+    return os.path.join(dest_root, genre, first_letter, new_name)
+
+def _device_of(path):
+    # Nearest existing ancestor decides the device for a not-yet-created dir
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return os.stat(path).st_dev
+
+def plan_move(file, file_path, info, dest_root, claimed, devices):
+    # Returns (move, skip reason); both are None when the file is already
+    # in place. claimed (target keys) and devices (dir -> st_dev) are
+    # shared across calls so a streamed plan catches the same conflicts.
+    target = target_path_for(file_path, info, dest_root)
+    src_key = os.path.normcase(os.path.abspath(file_path))
+    dst_key = os.path.normcase(os.path.abspath(target))
+    if src_key == dst_key:
+        return None, None
+    if dst_key in claimed:
+        return None, f"another ROM is already going to {target}"
+    if os.path.exists(target):
+        return None, f"target exists: {target}"
+    try:
+        st = os.stat(file_path)
+    except OSError as e:
+        return None, str(e)
+    target_dir = os.path.dirname(target)
+    if target_dir not in devices:
+        devices[target_dir] = _device_of(target_dir)
+    claimed.add(dst_key)
+    return Move(file, file_path, target, st.st_size, st.st_dev != devices[target_dir]), None
+
+def plan_moves(good, dest_root):
+    # Returns (moves, skipped); skipped holds (file, reason) pairs
+    moves = []
+    skipped = []
+    claimed = set()
+    devices = {}
+    for file, file_path, info in good:
+        move, reason = plan_move(file, file_path, info, dest_root, claimed, devices)
+        if move is not None:
+            moves.append(move)
+        elif reason is not None:
+            skipped.append((file, reason))
+    return moves, skipped
+
+def print_plan(moves, skipped):
+    for m in moves:
+        note = ' [copy across devices]' if m.cross_device else ''
+        print(f"  {m.src} -> {m.dst}{note}")
+    for file, reason in skipped:
+        print(f"  Skipping {file}: {reason}")
+    total = sum(m.size for m in moves)
+    copied = sum(m.size for m in moves if m.cross_device)
+    dirs = len({os.path.dirname(m.dst) for m in moves})
+    print(f"\nPlan: {len(moves)} moves into {dirs} folders, {len(skipped)} skipped, "
+          f"{total / (1024 * 1024):.1f} MB total ({copied / (1024 * 1024):.1f} MB copied across devices).")
+
+def _copy_hashed(src, dst):
+    crc = 0
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        while True:
+            data = fsrc.read(COPY_CHUNK_SIZE)
+            if not data:
+                break
+            crc = binascii.crc32(data, crc)
+            fdst.write(data)
+    shutil.copystat(src, dst)
+    return crc
+
+def _file_crc(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(COPY_CHUNK_SIZE)
+            if not data:
+                break
+            crc = binascii.crc32(data, crc)
+    return crc
+
+def copy_verify_unlink(src, dst):
+    tmp_path = dst + '.part'
+    try:
+        crc = _copy_hashed(src, tmp_path)
+        if _file_crc(tmp_path) != crc:
+            raise OSError(f"verification failed copying {src}")
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.remove(src)
+
+def execute_move(m, cache=None):
+    # A single move, for callers that move files as they are verified
+    # instead of executing a whole plan; raises OSError on failure
+    os.makedirs(os.path.dirname(m.dst), exist_ok=True)
+    if not m.cross_device:
+        try:
+            os.rename(m.src, m.dst)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        else:
+            if cache is not None:
+                cache.rename(m.src, m.dst)
+            return
+    copy_verify_unlink(m.src, m.dst)
+
+def execute_plan(moves, workers=4, cache=None):
+    # Returns (moved, failed) lists of Move / (Move, error) entries
+    moved = []
+    failed = []
+    for target_dir in sorted({os.path.dirname(m.dst) for m in moves}):
+        os.makedirs(target_dir, exist_ok=True)
+    copies = []
+    for m in moves:
+        if m.cross_device:
+            copies.append(m)
+            continue
+        try:
+            os.rename(m.src, m.dst)
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                copies.append(m)
+            else:
+                failed.append((m, e))
+            continue
+        if cache is not None:
+            cache.rename(m.src, m.dst)
+        moved.append(m)
+    if copies:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(m, pool.submit(copy_verify_unlink, m.src, m.dst)) for m in copies]
+            for m, future in futures:
+                try:
+                    future.result()
+                    moved.append(m)
+                except OSError as e:
+                    failed.append((m, e))
+    return moved, failed
@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import queue
+import threading
+from organizer import plan_move, execute_move, safe_name
+
+# Streaming scan -> organize -> covers pipeline for the headless "run"
+# command. Stages are thread groups joined by bounded queues: a ROM is
+# moved into place as soon as its hash is verified and its cover is
+# fetched as soon as it has been moved, so disk and network work overlap
+# instead of taking turns. Full queues block the stage feeding them,
+# which keeps memory flat however large the library is. The catalog and
+# report files are written by the caller once the stream has drained.
+
+DONE = object()  # end of stream, passed down each queue
+QUEUE_SIZE = 64
+
+def log_line(message):
+    # One write per line so messages from worker threads do not interleave
+    sys.stdout.write(message + '\n')
+
+class StageStats(dict):
+    # Counters shared by the worker threads of one stage
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+
+    def add(self, key, n=1):
+        with self.lock:
+            self[key] = self.get(key, 0) + n
+
+class Stage:
+    # `workers` threads call handle(item, emit, stats) for every item taken
+    # from inbox (a queue ending with DONE, or any iterable for the first
+    # stage); emit puts an item on outbox. The last worker to finish passes
+    # DONE on and writes the stage's metrics. A failing item is reported
+    # and counted, and the stream carries on.
+    def __init__(self, name, handle, inbox, outbox, workers=1, metrics=None, log=log_line):
+        self.name = name
+        self.handle = handle
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers if isinstance(inbox, queue.Queue) else 1
+        self.metrics = metrics
+        self.log = log
+        self.stats = StageStats()
+        self.error = None
+        self.threads = []
+        self._remaining = self.workers
+        self._lock = threading.Lock()
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def _items(self):
+        if not isinstance(self.inbox, queue.Queue):
+            yield from self.inbox
+            return
+        while True:
+            item = self.inbox.get()
+            if item is DONE:
+                self.inbox.put(DONE)  # for the other workers of this stage
+                return
+            yield item
+
+    def _run(self):
+        cpu = time.thread_time()
+        try:
+            for item in self._items():
+                try:
+                    self.handle(item, self.outbox.put, self.stats)
+                except Exception as e:
+                    self.log(f"{self.name}: {type(e).__name__}: {e}")
+                    self.stats.add('errors')
+        except BaseException as e:
+            # The source itself failed; end the stream so the stages
+            # downstream drain, and let run_pipeline re-raise
+            self.error = e
+        finally:
+            self.stats.add('cpu_s', time.thread_time() - cpu)
+            with self._lock:
+                self._remaining -= 1
+                last = self._remaining == 0
+            if last:
+                self.outbox.put(DONE)
+                if self.metrics is not None:
+                    counters = dict(self.stats)
+                    cpu_s = counters.pop('cpu_s')
+                    self.metrics.record(self.name, time.perf_counter() - self._started, cpu_s, counters,
+                                        f"{type(self.error).__name__}: {self.error}" if self.error else None)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+def run_pipeline(results, dest_root=None, cache=None, covers=None, queue_size=QUEUE_SIZE, sort_workers=4,
+                 metrics=None, log=log_line):
+    # results yields (file, path, info, record) like main.iter_scan. Good
+    # ROMs are moved into dest_root's genre/letter layout when dest_root
+    # is set, and their covers are fetched when covers (a CoverFetcher) is
+    # given. Returns a summary dict: catalog records as scanned, the good
+    # list with final paths, bad files, moves, failures and skips, and
+    # {title: cover path or None}.
+    summary = {'records': [], 'good': [], 'bad': [], 'moved': [], 'failed': [], 'skipped': [], 'covers': {}}
+    claimed = set()
+    devices = {}
+    plan_lock = threading.Lock()
+    fetched = set()
+    fetch_lock = threading.Lock()
+
+    def scan(result, emit, stats):
+        file, file_path, info, record = result
+        if dest_root is not None and os.path.normcase(os.path.abspath(file_path)) in claimed:
+            return  # a ROM moved ahead of the walk, seen again at its new path
+        if record is not None:
+            summary['records'].append(record)
+            stats.add('bytes', record['size'])
+        stats.add('files')
+        if info is None:
+            summary['bad'].append(file)
+            stats.add('bad')
+            return
+        stats.add('good')
+        if dest_root is None:
+            summary['good'].append((file, file_path, info))
+        emit((file, file_path, info))
+
+    def organize(item, emit, stats):
+        file, file_path, info = item
+        with plan_lock:
+            move, reason = plan_move(file, file_path, info, dest_root, claimed, devices)
+        if reason is not None:
+            log(f"Skipping {file}: {reason}")
+            summary['skipped'].append((file, reason))
+            stats.add('skipped')
+        elif move is not None:
+            try:
+                execute_move(move, cache)
+            except OSError as e:
+                log(f"Failed to move {file}: {e}")
+                summary['failed'].append((move, e))
+                stats.add('failed')
+            else:
+                log(f"Moved: {file} -> {move.dst}")
+                summary['moved'].append(move)
+                stats.add('files')
+                stats.add('bytes', move.size)
+                file_path = move.dst
+        summary['good'].append((file, file_path, info))
+        emit((file, file_path, info))
+
+    def fetch_cover(item, emit, stats):
+        title = item[2]['title']
+        name = safe_name(title)
+        with fetch_lock:
+            if name in fetched:
+                return
+            fetched.add(name)
+        path = covers.fetch(name)
+        summary['covers'][title] = path
+        stats.add('files')
+        if path:
+            stats.add('found')
+        emit(item)
+
+    handlers = [('scan', scan, 1)]
+    if dest_root is not None:
+        handlers.append(('organize', organize, sort_workers))
+    if covers is not None:
+        handlers.append(('covers', fetch_cover, covers.workers))
+    stages = []
+    inbox = results
+    for name, handle, workers in handlers:
+        outbox = queue.Queue(queue_size)
+        stages.append(Stage(name, handle, inbox, outbox, workers, metrics, log).start())
+        inbox = outbox
+    # The calling thread is the sink: it drains the last queue so the
+    # stages upstream never stall on it
+    while inbox.get() is not DONE:
+        pass
+    for stage in stages:
+        stage.join()
+    if covers is not None:
+        summary['retries'] = covers.retry_count
+        covers.save_negative_cache()
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
+    return summary
@@ -0,0 +1,45 @@
+import os
+import csv
+from pathlib import Path
+
+# Report files written into ROMForge/Reports from the library catalog
+
+REPORTS_DIR = Path(__file__).parent.resolve() / 'ROMForge' / 'Reports'
+
+def _replace(path, write):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+def write_reports(catalog, system, reports_dir=REPORTS_DIR):
+    os.makedirs(reports_dir, exist_ok=True)
+    games = [g for g in catalog.games() if g['system'] == system]
+    def write_health(f):
+        writer = csv.writer(f)
+        writer.writerow(['path', 'status', 'title'])
+        for g in games:
+            writer.writerow([g['path'], g['status'], g['title']])
+    _replace(os.path.join(reports_dir, 'health.csv'), write_health)
+    missing = catalog.missing(system)
+    def write_missing(f):
+        for title in missing:
+            f.write(title + '\n')
+    _replace(os.path.join(reports_dir, 'missing.txt'), write_missing)
+    good = sum(1 for g in games if g['status'] == 'good')
+    return {'good': good, 'bad': len(games) - good, 'missing': len(missing)}
+
+def write_duplicates(groups, reports_dir=REPORTS_DIR):
+    # One row per path of every duplicate group (see duplicates.py); the
+    # first copy of a group is the one hardlink dedupe keeps
+    os.makedirs(reports_dir, exist_ok=True)
+    def write(f):
+        writer = csv.writer(f)
+        writer.writerow(['group', 'size', 'sha1', 'copy', 'path'])
+        for i, group in enumerate(groups, 1):
+            for copy, paths in enumerate(group.files, 1):
+                for path in paths:
+                    writer.writerow([i, group.size, group.sha1, copy, path])
+    path = os.path.join(reports_dir, 'duplicates.csv')
+    _replace(path, write)
+    return path
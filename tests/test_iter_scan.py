@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+class FakeAgent:
+    errors = (ValueError,)
+
+    def __init__(self, batch_size, reply=None):
+        self.batch_size = batch_size
+        self.reply = reply
+        self.requests = []
+
+    def remote_path(self, path):
+        return path
+
+    def hash_many(self, paths):
+        self.requests.append(len(paths))
+        if self.reply is not None:
+            return self.reply(paths)
+        return [{'raw': format(i, '08x')} for i, _ in enumerate(paths)]
+
+
+def make_roms(root, count):
+    for i in range(count):
+        (root / f"{i:05d}.sfc").write_bytes(i.to_bytes(4, 'little'))
+    return sorted((p.name, str(p)) for p in root.iterdir())
+
+
+def test_agent_batches_stay_full_past_window(tmp_path):
+    agent = FakeAgent(batch_size=50)
+    files = make_roms(tmp_path, 350)
+    results = list(main.iter_scan(iter(files), {}, workers=4, agent=agent, window=100))
+    assert [r[1] for r in results] == [path for _, path in files]
+    assert agent.requests == [50] * 7
+
+
+def test_partial_batch_is_sent_when_it_holds_the_oldest_file(tmp_path):
+    agent = FakeAgent(batch_size=50)
+    files = make_roms(tmp_path, 30)
+    results = list(main.iter_scan(iter(files), {}, workers=4, agent=agent, window=10))
+    assert len(results) == 30
+    assert sum(agent.requests) == 30
+    assert len(agent.requests) == 3
+
+
+def test_malformed_agent_reply_falls_back_to_local_hashing(tmp_path):
+    agent = FakeAgent(batch_size=4, reply=lambda paths: [None] * len(paths))
+    files = make_roms(tmp_path, 8)
+    results = list(main.iter_scan(iter(files), {}, workers=2, agent=agent))
+    assert all(record['crc32'] for _, _, _, record in results)
@@ -0,0 +1,27 @@
+import os
+import sys
+import zipfile
+import binascii
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+def make_zip(path, data):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('game.sfc', data)
+    return format(binascii.crc32(data), '08x')
+
+
+def test_archive_member_must_match_dat_size(tmp_path):
+    archive = str(tmp_path / 'game.zip')
+    crc = make_zip(archive, b'\x00' * 1024)
+    assert main.verify_archive(archive, {crc: {'size': 1024}}) == crc
+    assert main.verify_archive(archive, {crc: {'size': 2048}}) is None
+
+
+def test_archive_matches_on_crc_when_dat_has_no_size(tmp_path):
+    archive = str(tmp_path / 'game.zip')
+    crc = make_zip(archive, b'\x01' * 1024)
+    assert main.verify_archive(archive, {crc: {'size': None}}) == crc
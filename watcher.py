@@ -0,0 +1,308 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import argparse
+import threading
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+import main
+from hash_cache import HashCache
+from catalog import Catalog
+from reports import write_reports
+from hash_agent import load_agent
+
+# Long-running watch mode. Changes under the ROM directory are collected
+# from inotify (Linux) and from a periodic scandir reconciliation against
+# the catalog (network mounts do not deliver inotify events for remote
+# writes). Changes are coalesced into batches; only the files in a batch
+# are hashed and the catalog is updated after each batch. The report files
+# are regenerated from the whole catalog, so that happens at most once per
+# report interval however many batches arrive in between.
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct('iIII')
+
+class ChangeQueue:
+    # Pending changed/deleted paths. A batch is released once events have
+    # been quiet for `settle` seconds, the oldest change is `max_wait`
+    # seconds old, or `max_batch` paths are waiting.
+    def __init__(self, settle=2.0, max_wait=15.0, max_batch=1000):
+        self.settle = settle
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.cond = threading.Condition()
+        self.changed = {}  # path -> None, keeps arrival order
+        self.deleted = set()
+        self.reconcile_requested = False
+        self.first_event = None
+        self.last_event = None
+
+    def _touch(self):
+        now = time.monotonic()
+        if self.first_event is None:
+            self.first_event = now
+        self.last_event = now
+        self.cond.notify()
+
+    def put_changed(self, path):
+        with self.cond:
+            self.deleted.discard(path)
+            self.changed[path] = None
+            self._touch()
+
+    def put_deleted(self, path):
+        with self.cond:
+            self.changed.pop(path, None)
+            self.deleted.add(path)
+            self._touch()
+
+    def request_reconcile(self):
+        with self.cond:
+            self.reconcile_requested = True
+            self.cond.notify()
+
+    def _ready(self):
+        if self.reconcile_requested:
+            return True
+        if self.first_event is None:
+            return False
+        now = time.monotonic()
+        return (now - self.last_event >= self.settle
+                or now - self.first_event >= self.max_wait
+                or len(self.changed) + len(self.deleted) >= self.max_batch)
+
+    def take_batch(self, timeout):
+        # Returns (changed, deleted, reconcile) or None on timeout
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while not self._ready():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = remaining if self.first_event is None else min(remaining, self.settle)
+                self.cond.wait(wait)
+            paths = list(self.changed)
+            changed = paths[:self.max_batch]
+            for path in changed:
+                del self.changed[path]
+            deleted = self.deleted
+            self.deleted = set()
+            reconcile = self.reconcile_requested
+            self.reconcile_requested = False
+            if self.changed:
+                self.first_event = self.last_event = time.monotonic()
+            else:
+                self.first_event = self.last_event = None
+            return changed, deleted, reconcile
+
+class InotifyWatcher:
+    def __init__(self, root, queue, exts):
+        self.root = root
+        self.queue = queue
+        self.exts = exts
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init failed")
+        self.dirs = {}  # watch descriptor -> directory
+        self.running = True
+        self.add_tree(root)
+
+    def add_tree(self, top):
+        for dirpath, _, _ in os.walk(top):
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    print("inotify watch limit reached; relying on periodic reconciliation")
+                    return
+                continue
+            self.dirs[wd] = dirpath
+
+    def _is_rom(self, name):
+        return name.lower().endswith(self.exts)
+
+    def _handle(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            self.queue.request_reconcile()
+            return
+        if mask & IN_IGNORED:
+            self.dirs.pop(wd, None)
+            return
+        directory = self.dirs.get(wd)
+        if directory is None or not name:
+            return
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Files may land before the new directory's watch exists
+                self.add_tree(path)
+                for file, file_path in main.iter_rom_files(path):
+                    self.queue.put_changed(file_path)
+            elif mask & IN_MOVED_FROM:
+                self.queue.request_reconcile()
+            return
+        if not self._is_rom(name):
+            return
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            self.queue.put_changed(path)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self.queue.put_deleted(path)
+
+    def run(self):
+        try:
+            while self.running:
+                ready, _, _ = select.select([self.fd], [], [], 1.0)
+                if not ready:
+                    continue
+                data = os.read(self.fd, 64 * 1024)
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = EVENT.unpack_from(data, offset)
+                    offset += EVENT.size
+                    name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                    offset += length
+                    self._handle(wd, mask, name)
+        finally:
+            os.close(self.fd)
+
+    def stop(self):
+        # The reader thread closes the descriptor within a second
+        self.running = False
+
+def reconcile(root, catalog, queue, exts):
+    # Compare the tree against the catalog using directory entries only
+    known = catalog.file_stats(root)
+    stack = [os.path.abspath(root)]
+    changes = 0
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.name.lower().endswith(exts):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if known.pop(entry.path, None) != (st.st_size, st.st_mtime_ns):
+                    queue.put_changed(entry.path)
+                    changes += 1
+    for path in known:
+        queue.put_deleted(path)
+        changes += 1
+    return changes
+
+def process_batch(changed, deleted, rom_info, size_index, cache, catalog, agent=None):
+    records = []
+    files = ((os.path.basename(p), p) for p in changed if os.path.exists(p))
+    good, bad = main.scan_files(files, rom_info, cache, size_index=size_index, records=records, agent=agent)
+    catalog.update_files(main.SYSTEM, records)
+    catalog.remove_files(deleted)
+    cache.forget(deleted)
+    cache.save()
+    return len(good), len(bad)
+
+def watch(rom_dir, interval=300.0, settle=2.0, max_wait=15.0, max_batch=1000, report_interval=60.0):
+    rom_dir = os.path.abspath(rom_dir)
+    dat_path = Path(main.DAT_FILENAME)
+    if not dat_path.exists():
+        main.download_dat_file(dat_path)
+    rom_info = main.load_rom_info(dat_path, main.INDEX_FILENAME)
+    size_index = main.build_size_index(rom_info)
+    cache = HashCache(main.CACHE_FILENAME)
+    catalog = Catalog()
+    catalog.sync_dat(main.SYSTEM, rom_info, main.dat_index.dat_fingerprint(dat_path))
+    agent = load_agent()
+    exts = main.rom_extensions()
+    queue = ChangeQueue(settle, max_wait, max_batch)
+    watcher = None
+    if sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher(rom_dir, queue, exts)
+            threading.Thread(target=watcher.run, daemon=True).start()
+            print(f"Watching {rom_dir} with inotify ({len(watcher.dirs)} folders)")
+        except OSError as e:
+            print(f"inotify unavailable ({e}); using periodic reconciliation only")
+    print(f"Reconciling {rom_dir} every {interval:.0f}s")
+    queue.request_reconcile()
+    next_reconcile = time.monotonic() + interval
+    next_report = 0.0
+    reports_stale = False
+
+    def update_reports():
+        nonlocal next_report, reports_stale
+        totals = write_reports(catalog, main.SYSTEM)
+        reports_stale = False
+        next_report = time.monotonic() + report_interval
+        print(f"Reports updated | library {totals['good']} good, {totals['bad']} bad, "
+              f"{totals['missing']} missing")
+
+    try:
+        while True:
+            wake = min(next_reconcile, next_report) if reports_stale else next_reconcile
+            batch = queue.take_batch(timeout=max(0.0, wake - time.monotonic()))
+            if reports_stale and time.monotonic() >= next_report:
+                update_reports()
+            if batch is None and time.monotonic() < next_reconcile:
+                continue
+            if batch is None or batch[2]:
+                found = reconcile(rom_dir, catalog, queue, exts)
+                if found:
+                    print(f"Reconciliation found {found} changes")
+                next_reconcile = time.monotonic() + interval
+                if batch is None:
+                    continue
+            changed, deleted, _ = batch
+            if not changed and not deleted:
+                continue
+            good, bad = process_batch(changed, deleted, rom_info, size_index, cache, catalog, agent)
+            print(f"Batch: {len(changed)} changed ({good} good, {bad} bad), {len(deleted)} removed")
+            reports_stale = True
+            if time.monotonic() >= next_report:
+                update_reports()
+    except KeyboardInterrupt:
+        print("Stopping watcher.")
+    finally:
+        if watcher:
+            watcher.stop()
+        if reports_stale:
+            write_reports(catalog, main.SYSTEM)
+        cache.save()
+        catalog.close()
+
+def cli():
+    parser = argparse.ArgumentParser(description='Keep the ROM catalog up to date as files change')
+    parser.add_argument('rom_dir')
+    parser.add_argument('--interval', type=float, default=300.0, help='seconds between full reconciliations')
+    parser.add_argument('--settle', type=float, default=2.0, help='quiet time before a batch is processed')
+    parser.add_argument('--max-wait', type=float, default=15.0, help='longest a change waits during bursts')
+    parser.add_argument('--max-batch', type=int, default=1000)
+    parser.add_argument('--report-interval', type=float, default=60.0,
+                        help='shortest time between rewrites of the report files')
+    args = parser.parse_args()
+    if not os.path.isdir(args.rom_dir):
+        parser.error(f"not a directory: {args.rom_dir}")
+    watch(args.rom_dir, args.interval, args.settle, args.max_wait, args.max_batch, args.report_interval)
+
+if __name__ == '__main__':
+    cli()